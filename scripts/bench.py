@@ -0,0 +1,448 @@
+# -*- coding: utf-8 -*-
+# Benchmarks `my-rss.py` offline: every source is served from the recorded
+# feeds in `fixtures/` by a local HTTP server, and each stage of a run is timed.
+#
+#   python scripts/bench.py                       # recorded fixtures only
+#   python scripts/bench.py --sizes 10000 100000  # plus synthetic feeds
+#   python scripts/bench.py --memory              # plus each stage's peak memory
+#   python scripts/bench.py --micro               # only the per-item helpers
+#
+# (or `python scripts/my-rss.py bench ...`, with the same options)
+#
+# Synthetic feeds repeat the recorded items, with unique links and one minute
+# between each, until every feed has the given number of items
+import argparse
+import contextlib
+import datetime
+import email.utils
+import gzip
+import http.server
+import importlib.util
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import tracemalloc
+import urllib.parse
+try:
+	import resource
+except ImportError:
+	resource = None
+
+# Next to this file
+import http_client
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(SCRIPTS_DIR, "fixtures")
+
+# Which fixture answers each feed, by host and path
+FIXTURES = {
+	("letterboxd.com", "/matheusavellar/rss/"): "letterboxd.xml",
+	("en.wikipedia.org", "/w/api.php"): "wikipedia-en.json",
+	("commons.wikimedia.org", "/w/api.php"): "wikipedia-commons.json",
+	("pt.wikipedia.org", "/w/api.php"): "wikipedia-pt.json",
+	("myanimelist.net", "/rss.php"): "mal.xml",
+	("www.goodreads.com", "/review/list_rss/193877929"): "goodreads-reviews.xml",
+	("www.goodreads.com", "/user_status/list/193877929-matheus-avellar"): "goodreads-statuses.xml",
+	("api.github.com", "/users/MatheusAvellar/events/public"): "github-events.json",
+	("api.github.com", "/users/MatheusAvellar/gists"): "github-gists.json",
+}
+CONTENT_TYPES = {
+	".xml": "application/xml; charset=utf-8",
+	".json": "application/json; charset=utf-8",
+}
+# Parser and source of each fixture, for timing parsing on its own
+PARSERS = {
+	"letterboxd.xml": ("parse_letterboxd", "letterboxd"),
+	"wikipedia-en.json": ("parse_wikipedia", "wikipedia"),
+	"wikipedia-commons.json": ("parse_wikipedia", "wikipedia"),
+	"wikipedia-pt.json": ("parse_wikipedia", "wikipedia"),
+	"mal.xml": ("parse_mal", "mal"),
+	"goodreads-reviews.xml": ("parse_goodreads_reviews", "goodreads"),
+	"goodreads-statuses.xml": ("parse_goodreads_statuses", "goodreads"),
+	"github-events.json": ("parse_github", "github"),
+	"github-gists.json": ("parse_gist", "gist"),
+}
+
+# The run's cache and output go to a scratch directory, so benchmarking never
+# touches the real ones. Has to be set before `my-rss.py` is loaded
+WORK_DIR = tempfile.mkdtemp(prefix="rss-bench-")
+os.environ["RSS_CACHE_DIR"] = os.path.join(WORK_DIR, "cache")
+os.environ["RSS_OUTPUT_DIR"] = WORK_DIR
+os.makedirs(os.environ["RSS_CACHE_DIR"])
+
+# The file name isn't a valid module name, so it's loaded by path
+spec = importlib.util.spec_from_file_location("rss", os.path.join(SCRIPTS_DIR, "my-rss.py"))
+rss = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(rss)
+rss.load_state()
+# Fixtures have fixed dates, so nothing is left out for being too old
+rss.CUTOFF = 0
+# What the fixtures were recorded from
+PROFILE = "eu"
+PLAN = rss.plan_feeds({ PROFILE: rss.DEFAULT_PROFILES[PROFILE] })
+
+
+#####################
+## Synthetic feeds ##
+#####################
+SYNTHETIC_START = datetime.datetime(2025, 8, 1, tzinfo=datetime.timezone.utc)
+XML_ITEM = re.compile(r"<(item|entry)>.*?</\1>", re.S)
+XML_LINK = re.compile(r"(<(?:link|id)>(?:<!\[CDATA\[)?)([^<\]]+)")
+XML_DATE = re.compile(r"(<(pubDate|updated)>(?:<!\[CDATA\[)?)([^<\]]+)")
+
+
+def synthetic_xml(body, size):
+	text = body.decode("utf-8")
+	items = [ match.group(0) for match in XML_ITEM.finditer(text) ]
+	head = text[:text.index(items[0])]
+	tail = text[text.rindex(items[-1]) + len(items[-1]):]
+	chunks = [ head ]
+	for i in range(size):
+		dt = SYNTHETIC_START - datetime.timedelta(minutes=i)
+		item = XML_LINK.sub(lambda m: f"{m.group(1)}{m.group(2)}#{i}", items[i % len(items)], count=1)
+		item = XML_DATE.sub(
+			lambda m: m.group(1) + (
+				email.utils.format_datetime(dt)
+				if m.group(2) == "pubDate"
+				else dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+			),
+			item
+		)
+		chunks.append(item + "\n")
+	chunks.append(tail)
+	return "".join(chunks).encode("utf-8")
+
+
+def synthetic_json(body, size):
+	document = json.loads(body)
+	items = list(json_items(document))
+	output = []
+	for i in range(size):
+		item = dict(items[i % len(items)])
+		created_at = (SYNTHETIC_START - datetime.timedelta(minutes=i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+		if "revid" in item:
+			item["revid"] = i
+			item["timestamp"] = created_at
+			output.append(item)
+			continue
+		item["created_at"] = created_at
+		if "repo" in item:
+			item["id"] = str(i)
+			item["repo"] = { "name": f"{item['repo']['name']}-{i}" }
+		else:
+			item["id"] = str(i)
+			item["html_url"] = f"{item['html_url']}-{i}"
+			item["updated_at"] = created_at
+		output.append(item)
+	if isinstance(document, dict):
+		return json.dumps({ **document, "query": { "usercontribs": output } }).encode("utf-8")
+	return json.dumps(output).encode("utf-8")
+
+
+def json_items(document):
+	# MediaWiki API responses have their items under "query"
+	return rss.json_items(document, continued=isinstance(document, dict))
+
+
+def load_bodies(size=None):
+	bodies = {}
+	for name in set(FIXTURES.values()):
+		with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+			body = f.read()
+		if size is not None:
+			body = synthetic_json(body, size) if name.endswith(".json") else synthetic_xml(body, size)
+		bodies[name] = body
+	return bodies
+
+
+def count_items(name, body):
+	if name.endswith(".json"):
+		return len(list(json_items(json.loads(body))))
+	return body.count(b"<item>") + body.count(b"<entry>")
+
+
+#####################
+## Mock server     ##
+#####################
+class FixtureHandler(http.server.BaseHTTPRequestHandler):
+	# Serves `/<host>/<path>` from `server.bodies`, gzipped when asked to
+	protocol_version = "HTTP/1.1"
+	# Otherwise small responses wait on delayed ACKs, and every fetch looks
+	# 40ms slower than it is
+	disable_nagle_algorithm = True
+
+	def do_GET(self):
+		host, _, path = urllib.parse.urlsplit(self.path).path.lstrip("/").partition("/")
+		name = FIXTURES.get((host, "/" + path))
+		if name is None:
+			self.send_response(404)
+			self.send_header("Content-Length", "0")
+			self.end_headers()
+			return
+		body = self.server.bodies[name]
+		gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+		if gzipped:
+			body = self.server.gzipped[name]
+		self.send_response(200)
+		self.send_header("Content-Type", CONTENT_TYPES[os.path.splitext(name)[1]])
+		self.send_header("Content-Length", str(len(body)))
+		if gzipped:
+			self.send_header("Content-Encoding", "gzip")
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):
+		pass
+
+
+class FixtureServer(http.server.ThreadingHTTPServer):
+	daemon_threads = True
+
+	def serve(self, bodies):
+		self.bodies = bodies
+		self.gzipped = { name: gzip.compress(body, compresslevel=6) for name, body in bodies.items() }
+
+
+class MirrorAdapter(http_client.TimedAdapter):
+	# Sends `https://<host>/<path>` to the mock server instead
+	def __init__(self, origin, **kwargs):
+		self.origin = origin
+		super().__init__(**kwargs)
+
+	def send(self, request, **kwargs):
+		parts = urllib.parse.urlsplit(request.url)
+		request.url = f"{self.origin}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+		return super().send(request, **kwargs)
+
+
+#####################
+## Stages          ##
+#####################
+def reset():
+	# Every run starts as if it were the first one
+	with rss.store_lock, rss.store:
+		rss.store.execute("DELETE FROM events")
+		rss.store.execute("DELETE FROM feeds")
+		rss.store.execute("DELETE FROM seen")
+		rss.store.execute("DELETE FROM archive")
+		rss.store.execute("DELETE FROM artwork")
+	rss.feeds.clear()
+	rss.seen.clear()
+	rss.artwork.clear()
+	rss.archived.clear()
+	rss.http_cache.clear()
+	rss.output_hashes.clear()
+
+
+def parse_all(bodies):
+	output = {}
+	for name, body in bodies.items():
+		parser, source = PARSERS[name]
+		url = next(f"https://{host}{path}" for (host, path), fixture in FIXTURES.items() if fixture == name)
+		parse = getattr(rss, parser)
+		ordered = rss.SOURCES[source].ordered
+		if name.endswith(".json"):
+			output[name] = parse(json_items(json.loads(body)), url, 0, ordered)
+		else:
+			output[name] = parse(io.BytesIO(body), url, 0, ordered)
+	return output
+
+
+def stages(bodies):
+	# Yields each stage as (name, run, items); the code between the yields
+	# runs before the next stage starts, so it isn't timed
+	def entry_count(results):
+		return sum(len(entries or []) for _, entries in results.values())
+
+	yield "parse (in memory)", lambda: parse_all(bodies), lambda r: sum(map(len, r.values()))
+	# Sources one at a time first, so each one's time is its own
+	for source, feeds in PLAN[PROFILE].items():
+		reset()
+		plan = { PROFILE: { source: feeds } }
+		yield f"fetch+parse {source}", lambda plan=plan: rss.collect(plan), entry_count
+	reset()
+	state = {}
+	yield "fetch+parse all", lambda: state.setdefault("results", rss.collect(PLAN)), entry_count
+	yield "store", lambda: rss.merge(state["results"], PLAN, rss.STARTED_AT), lambda _: entry_count(state["results"])
+	yield "merge", lambda: state.setdefault("events", rss.latest_events(PROFILE, PLAN[PROFILE])), len
+	# The latest events, plus every stored one in the shards by source
+	yield "output", lambda: rss.write_output(PROFILE, state["events"], PLAN[PROFILE]), lambda written: (
+		written[0]["latest"]["events"] + sum(
+			shard["events"] for months in written[0]["sources"].values() for shard in months.values()
+		)
+	)
+
+
+def run_stages(bodies, traced=False):
+	rows = []
+	for name, run, items in stages(bodies):
+		if traced:
+			tracemalloc.reset_peak()
+		started = time.perf_counter()
+		result = run()
+		elapsed = time.perf_counter() - started
+		peak = tracemalloc.get_traced_memory()[1] if traced else 0
+		rows.append((name, elapsed, items(result), peak))
+	return rows
+
+
+def measure(bodies, rounds, memory=False):
+	# Fastest of `rounds` runs per stage. With `memory`, one more run under
+	# `tracemalloc` gets each stage's peak memory; it's about 10x slower
+	best = {}
+	for _ in range(rounds):
+		for name, elapsed, items, _ in run_stages(bodies):
+			if name not in best or elapsed < best[name][0]:
+				best[name] = (elapsed, items)
+	peaks = {}
+	if memory:
+		tracemalloc.start()
+		try:
+			peaks = { name: peak for name, _, _, peak in run_stages(bodies, traced=True) }
+		finally:
+			tracemalloc.stop()
+	return [ (name, elapsed, items, peaks.get(name)) for name, (elapsed, items) in best.items() ]
+
+
+def report(label, bodies, rows):
+	feed_items = sum(count_items(name, body) for name, body in bodies.items())
+	feed_bytes = sum(map(len, bodies.values()))
+	print(f"\n{label}: {len(bodies)} feeds, {feed_items} items, {feed_bytes / 1024:.0f} KiB")
+	print(f"{'stage':<26}{'time (ms)':>12}{'items':>10}{'items/s':>12}{'peak (KiB)':>12}")
+	for name, elapsed, items, peak in rows:
+		rate = f"{items / elapsed:.0f}" if elapsed > 0 and items else "-"
+		peak = f"{peak / 1024:.0f}" if peak is not None else "-"
+		print(f"{name:<26}{elapsed * 1000:>12.1f}{items:>10}{rate:>12}{peak:>12}")
+	if resource is not None:
+		# Kilobytes on Linux, bytes on macOS; it only ever goes up, so this is
+		# the peak so far, including any earlier feed sizes
+		max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+		if sys.platform == "darwin":
+			max_rss //= 1024
+		print(f"Max RSS so far: {max_rss / 1024:.0f} MiB")
+
+
+#####################
+## Per-item        ##
+#####################
+PULL_REQUEST = {
+	"action": "opened",
+	"pull_request": {
+		"head": { "ref": "incremental-fetch" },
+		"base": { "ref": "main" },
+		"url": "https://api.github.com/repos/MatheusAvellar/api/pulls/1"
+	}
+}
+RFC822 = "%a, %d %b %Y %H:%M:%S %z"
+ISO8601 = "%Y-%m-%dT%H:%M:%S%z"
+# A spread of dates and offsets, as feeds write them
+SAMPLE_DATES = [
+	(SYNTHETIC_START - datetime.timedelta(minutes=97 * i)).astimezone(
+		datetime.timezone(datetime.timedelta(hours=(-7, -3, 0, 12)[i % 4]))
+	)
+	for i in range(1000)
+]
+RFC822_DATES = [ dt.strftime(RFC822) for dt in SAMPLE_DATES ]
+ISO8601_DATES = [ dt.strftime("%Y-%m-%dT%H:%M:%S%z") for dt in SAMPLE_DATES ]
+# Name, function, and inputs it's called with, one at a time
+MICRO_BENCHMARKS = [
+	# How timestamps used to be parsed, for comparison
+	("rfc822 (strptime)", lambda value: int(datetime.datetime.strptime(value, RFC822).timestamp()), RFC822_DATES),
+	("rfc822", rss.timestamps.parse_rfc822, RFC822_DATES),
+	("iso8601 (strptime)", lambda value: int(datetime.datetime.strptime(value, ISO8601).timestamp()), ISO8601_DATES),
+	("iso8601", rss.timestamps.parse_iso8601, ISO8601_DATES),
+	("wiki edit", rss.classify_wiki_edit, [
+		"fix typo",
+		"Uploaded a work by Avelludo from Wikimedia Commons",
+		"Create article about the Brazilian real",
+		"Cria rascunho sobre o real brasileiro",
+	]),
+	("github event", lambda args: rss.describe_github_event(*args), [
+		("PullRequestEvent", PULL_REQUEST),
+		("PullRequestEvent", { **PULL_REQUEST, "action": "labeled" }),
+		("CreateEvent", { "ref_type": "branch", "ref": "fixtures" }),
+		("WatchEvent", { "action": "started" }),
+		("PushEvent", {}),
+	]),
+	("mal progress", rss.MAL_PROGRESS.search, [
+		" Completed - 6 of 6 episodes ",
+		" Watching - 3 of 26 episodes ",
+		" Plan to Watch - 0 of 12 episodes ",
+	]),
+	("identity (url)", lambda event: rss.identity_key("goodreads:1", rss.same_url(event)), [
+		rss.Event(
+			"https://www.goodreads.com/review/show/7918416850?utm_medium=api&utm_source=rss",
+			1753968190, "Arrival (2002)", "goodreads", rss.GoodreadsAdded("added", "Arrival", "2002", "", "", "", "")
+		),
+		rss.Event(
+			"https://www.goodreads.com/user_status/show/1140465388",
+			1753968190, "Arrival (2002)", "goodreads", rss.GoodreadsProgress("pages-read", "Arrival", "2002", 20, 304)
+		),
+	]),
+	("identity (page+day)", lambda event: rss.identity_key("wikimedia:1", rss.same_page_and_day(event)), [
+		rss.Event("https://en.wikipedia.org/w/index.php?diff=1", 1753968190, "Real", "wiki", rss.WikiEdit("edit", "en", "")),
+	]),
+	("goodreads status", rss.classify_goodreads_status, [
+		"Matheus Avellar is on page 70 of 432 of Tales of Old Japan",
+		"Matheus Avellar is finished with Arrival",
+		"Matheus Avellar liked a review",
+	]),
+]
+
+
+def micro_benchmarks():
+	print(f"{'helper':<20}{'ns/call':>10}")
+	for name, run, inputs in MICRO_BENCHMARKS:
+		timer = timeit.Timer(lambda: [ run(value) for value in inputs ])
+		loops, _ = timer.autorange()
+		best = min(timer.repeat(repeat=5, number=loops))
+		print(f"{name:<20}{best / loops / len(inputs) * 1e9:>10.0f}")
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmarks my-rss.py against recorded feeds")
+	parser.add_argument("--sizes", type=int, nargs="*", default=[],
+		help="also run with synthetic feeds of this many items each (e.g. 10000 100000)")
+	parser.add_argument("--rounds", type=int, default=3,
+		help="runs per stage; the fastest one is reported")
+	parser.add_argument("--memory", action="store_true",
+		help="also report each stage's peak memory, from an extra (much slower) run")
+	parser.add_argument("--micro", action="store_true",
+		help="only time the per-item helpers (timestamps, classifiers) on sample inputs")
+	args = parser.parse_args()
+
+	if args.micro:
+		micro_benchmarks()
+		return
+
+	server = FixtureServer(("127.0.0.1", 0), FixtureHandler)
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	adapter = MirrorAdapter(
+		f"http://127.0.0.1:{server.server_address[1]}",
+		pool_connections=16,
+		pool_maxsize=rss.MAX_CONNECTIONS_PER_HOST,
+		pool_block=True
+	)
+	rss.get_session().mount("https://", adapter)
+
+	try:
+		for size in [ None, *args.sizes ]:
+			bodies = load_bodies(size)
+			server.serve(bodies)
+			# The script's own progress messages would drown out the report
+			with contextlib.redirect_stdout(io.StringIO()):
+				rows = measure(bodies, args.rounds, memory=args.memory)
+			report("Recorded fixtures" if size is None else f"Synthetic, {size} items per feed", bodies, rows)
+	finally:
+		server.shutdown()
+		rss.store.close()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# The HTTP client `my-rss.py` fetches feeds with. It's only imported once
+# something is fetched, since `requests` alone takes longer to import than
+# re-rendering the output from the store does
+import threading
+import time
+import requests
+import urllib3
+
+# Time the current thread's request spent opening a connection, DNS lookup and
+# TLS handshake included; 0 when it reused a kept-alive one
+connect_timing = threading.local()
+RequestException = requests.RequestException
+
+
+class TimedConnect:
+	def connect(self):
+		started = time.perf_counter()
+		super().connect()
+		connect_timing.seconds = time.perf_counter() - started
+
+
+class TimedHTTPConnectionPool(urllib3.HTTPConnectionPool):
+	ConnectionCls = type("TimedHTTPConnection", (TimedConnect, urllib3.connection.HTTPConnection), {})
+
+
+class TimedHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+	ConnectionCls = type("TimedHTTPSConnection", (TimedConnect, urllib3.connection.HTTPSConnection), {})
+
+
+class TimedAdapter(requests.adapters.HTTPAdapter):
+	# Opens connections that record how long they took (see `connect_timing`)
+	def init_poolmanager(self, *args, **kwargs):
+		super().init_poolmanager(*args, **kwargs)
+		self.poolmanager.pool_classes_by_scheme = {
+			"http": TimedHTTPConnectionPool,
+			"https": TimedHTTPSConnectionPool,
+		}
+
+
+def make_session(max_connections_per_host):
+	session = requests.Session()
+	adapter = TimedAdapter(
+		pool_connections=16,
+		pool_maxsize=max_connections_per_host,
+		pool_block=True
+	)
+	session.mount("https://", adapter)
+	session.mount("http://", adapter)
+	# Advertises gzip/deflate, plus brotli when the `brotli` package is installed
+	session.headers.update(urllib3.util.make_headers(accept_encoding=True))
+	return session
@@ -1,29 +1,1241 @@
 # -*- coding: utf-8 -*-
+import argparse
+import contextlib
 import datetime
+import gzip
+import hashlib
+import heapq
+import itertools
+import mmap
+import os
+import random
 import re
-import requests
+import shutil
+import signal
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+import urllib.parse
 import json
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, NamedTuple
+try:
+	import brotli
+except ImportError:
+	brotli = None
 
-def get_text(element: BeautifulSoup | None):
-	if element is not None:
-		return element.get_text()
-	return ""
+# Next to this file
+import timestamps
 
+# Maximum number of HTTP requests in flight at once, across every source
+MAX_CONCURRENCY = int(os.environ.get("RSS_MAX_CONCURRENCY", "8"))
+fetch_slots = threading.BoundedSemaphore(MAX_CONCURRENCY)
+# Keep-alive connections kept open per host; further requests to the same host
+# wait for one of them instead of opening a new connection
+MAX_CONNECTIONS_PER_HOST = int(os.environ.get("RSS_MAX_CONNECTIONS_PER_HOST", "2"))
+# (connect, read) timeouts, in seconds
+HTTP_TIMEOUT = (
+	float(os.environ.get("RSS_CONNECT_TIMEOUT", "5")),
+	float(os.environ.get("RSS_READ_TIMEOUT", "30")),
+)
+# Network errors and these statuses are retried, up to `RETRY_ATTEMPTS` tries in
+# total, with exponential backoff starting at `RETRY_BASE_DELAY` seconds
+RETRY_STATUSES = { 429, 500, 502, 503, 504 }
+RETRY_ATTEMPTS = int(os.environ.get("RSS_RETRY_ATTEMPTS", "4"))
+RETRY_BASE_DELAY = float(os.environ.get("RSS_RETRY_BASE_DELAY", "1"))
+# Longest we'll wait for a single retry, e.g. when told to by `Retry-After`;
+# anything longer is given up on instead
+RETRY_MAX_DELAY = float(os.environ.get("RSS_RETRY_MAX_DELAY", "60"))
+# Seconds the whole run may spend waiting between retries, across all sources
+RETRY_BUDGET = float(os.environ.get("RSS_RETRY_BUDGET", "120"))
+retry_budget_left = RETRY_BUDGET
+retry_budget_lock = threading.Lock()
+# Host -> semaphore, see `host_slot()`
+host_slots = {}
+host_slots_lock = threading.Lock()
 
-def get_xml(url, headers=None):
-	print(f"Sending GET to '{url}'")
-	res = None
-	if headers:
-		res = requests.get(url=url, headers=headers)
+
+# Shared by every collector, so e.g. GitHub events and gists reuse a connection.
+# Made on first use, see `get_session()`
+session = None
+session_lock = threading.Lock()
+
+
+def get_session():
+	# Commands that don't fetch anything never import the HTTP client
+	global session
+	with session_lock:
+		if session is None:
+			import http_client
+			session = http_client.make_session(MAX_CONNECTIONS_PER_HOST)
+	return session
+
+STARTED_AT = int(time.time())
+# Events older than this (a Unix timestamp) are left out; computed once for the
+# whole run
+CUTOFF_DAYS = 30
+CUTOFF = STARTED_AT - CUTOFF_DAYS * 24 * 60 * 60
+# How often a feed is fetched adapts to how often it has anything new (see
+# `check_feed()`), between its source's `ttl` and this many seconds. Only the
+# daemon waits that long; `fetch` runs on a schedule, so it only skips feeds
+# fetched less than their `ttl` ago
+MAX_INTERVAL = int(os.environ.get("RSS_MAX_INTERVAL", str(24 * 60 * 60)))
+# Fetches per gap between new events; e.g. with 2, a feed that gets something
+# new every 6 hours is fetched every 3
+POLLS_PER_EVENT = 2
+# What the interval is multiplied by after a fetch with nothing new, and after
+# a failed one
+QUIET_BACKOFF = 1.5
+FAILED_BACKOFF = 2
+
+
+# Identity rules: what makes two events the same, as a tuple (see
+# `Source.identity`). Each starts with its own name, so different rules never
+# give the same identity
+def same_title(event):
+	return ("title", event.title, event.details.event)
+
+
+def same_title_and_day(event):
+	# Days in UTC
+	return ("day", event.title, event.details.event, event.timestamp // 86400)
+
+
+def same_page_and_day(event):
+	# As `same_title_and_day()`, but for wiki edits, whose pages are only the
+	# same on the same wiki (`kind`, e.g. "en" or "commons")
+	return ("page", event.details.kind, event.title, event.details.event, event.timestamp // 86400)
+
+
+def same_action(event):
+	# The same thing done to the same link (e.g. a pull request, or the
+	# repository if there's nothing more specific), such as a pull request
+	# opened twice. Being stored by the same link and description too (see
+	# `VARIANT_FIELDS`), only the last time is kept
+	return ("action", event.url, event.details.event, event.details.description)
+
+
+def same_url(event):
+	# The same link, whatever tracking parameters (`utm_*`) it was given
+	parts = urllib.parse.urlsplit(event.url)
+	query = parts.query
+	if "utm_" in query:
+		query = urllib.parse.urlencode([
+			(name, value)
+			for name, value in urllib.parse.parse_qsl(query, keep_blank_values=True)
+			if not name.startswith("utm_")
+		])
+	return ("url", parts.netloc.lower(), parts.path, query, event.details.event)
+
+
+def identity_key(scope, identity):
+	# Identities are only compared as 64-bit hashes, which fit in SQLite's
+	# INTEGER; a collision would drop an event, but that's unlikely enough
+	digest = hashlib.blake2b(
+		"\x1f".join(map(str, (scope, *identity))).encode("utf-8"),
+		digest_size=8
+	).digest()
+	return int.from_bytes(digest, "big", signed=True)
+
+
+def keep_results(results, feed_urls):
+	# The default `Source.normalize`, for sources whose feeds need no fixing up
+	return results
+
+
+class Source(NamedTuple):
+	# Which of a profile's accounts (see `DEFAULT_PROFILES`) this source reads
+	account: str
+	# Each of `feeds` is a dict of `fetch_entries()` arguments, where "url" is
+	# filled in with the account as `{user}`, or its leading number as
+	# `{user_id}`. Every feed is fetched and parsed at once, and then their
+	# results (None for a feed that failed) go through `normalize`, which
+	# returns them fixed up, e.g. with details only another feed has
+	feeds: list
+	normalize: Callable[[list, list], list] = keep_results
+	# Whether the feeds are served newest-first. If so, reading stops at the
+	# first item older than the cutoff, which also skips downloading the rest
+	ordered: bool = True
+	# Seconds the feeds are at least left alone after being fetched,
+	# successfully or not; longer if they're quiet or failing (see
+	# `check_feed()`). Until then the stored events are served as they are, so
+	# a source that's failing or throttling us isn't hit again on every run
+	ttl: int = 60 * 60
+	# Most events of this source in the output
+	limit: int = 10
+	# Rule for which events are the same (e.g. `same_url`), from this or any
+	# other source of the same account. Of the same events, only the newest
+	# is shown; the others are still stored, as superseded by it, so the
+	# history stays complete
+	identity: Callable[["Event"], tuple] = same_title
+
+
+class Event(NamedTuple):
+	url: str
+	# Unix timestamp, in seconds
+	timestamp: int
+	title: str
+	type: str
+	details: "EventDetails"
+
+
+# Per-source `details` of an event. Field order is the order they're written
+# to rss.json in
+class LetterboxdReview(NamedTuple):
+	event: str
+	watched_date: str
+	is_rewatch: bool
+	raw_title: str
+	raw_year: str
+	rating: str
+	tmdb_id: str
+
+
+class LetterboxdList(NamedTuple):
+	event: str
+
+
+class WikiEdit(NamedTuple):
+	event: str
+	kind: str
+	description: str
+
+
+class MalUpdate(NamedTuple):
+	event: str
+	status: str | None
+	episodes_watched: str | None
+	episodes_total: str | None
+
+
+class GithubEvent(NamedTuple):
+	kind: str
+	event: str
+	description: str
+
+
+class GistEvent(NamedTuple):
+	kind: str
+	event: str
+
+
+class GoodreadsAdded(NamedTuple):
+	event: str
+	raw_title: str
+	raw_year: str
+	author: str
+	rating: str
+	shelves: str
+	isbn: str
+	# Goodreads' own ID for the book; events stored before it was kept don't
+	# have it
+	book_id: str = ""
+
+
+class GoodreadsProgress(NamedTuple):
+	event: str
+	raw_title: str
+	raw_year: str | None
+	pages_read: str | int
+	pages_total: str | int
+
+
+EventDetails = (
+	LetterboxdReview | LetterboxdList | WikiEdit | MalUpdate
+	| GithubEvent | GistEvent | GoodreadsAdded | GoodreadsProgress
+)
+DETAILS_TYPES = { cls.__name__: cls for cls in EventDetails.__args__ }
+# Details of films and books: the fields saying which one it is, of which the
+# first one that isn't blank makes its key in `artwork` (see `artwork_key()`),
+# and the field its poster or cover is added to rss.json as, when we know it
+ARTWORK_FIELDS = {
+	LetterboxdReview: (("tmdb_id",), "poster_url"),
+	GoodreadsAdded: (("isbn", "book_id"), "cover_url"),
+}
+
+
+# Details field that tells apart different events of the same kind with the
+# same link, which are then stored separately (see `stored_key()`); e.g. a
+# branch and a tag created in the same repository. Other events are the same
+# event if they're of the same kind with the same link
+VARIANT_FIELDS = {
+	GithubEvent: "description",
+}
+
+
+def stored_key(feed, entry):
+	# What the stored event `entry` is known by (`events`' primary key)
+	field = VARIANT_FIELDS.get(type(entry.details))
+	variant = getattr(entry.details, field) if field else ""
+	return (feed, entry.url, entry.type, entry.details.event, variant)
+
+
+def artwork_key(details):
+	# e.g. "tmdb_id:615453", or "book_id:31625351" for a book without an ISBN;
+	# None if it's neither a film nor a book, or says nothing about which
+	id_fields, _ = ARTWORK_FIELDS.get(type(details), ((), None))
+	for field in id_fields:
+		value = getattr(details, field)
+		if value:
+			return f"{field}:{value}"
+	return None
+
+
+def pack_event(event):
+	# Flattens an event into JSON-friendly lists, for the caches
+	return [
+		event.url,
+		event.timestamp,
+		event.title,
+		event.type,
+		type(event.details).__name__,
+		list(event.details)
+	]
+
+
+def unpack_event(packed):
+	url, timestamp, title, type, details_type, details = packed
+	return Event(url, timestamp, title, type, DETAILS_TYPES[details_type](*details))
+
+
+def event_json(event, shown=True):
+	# The event as it's written to rss.json. Without `shown` (e.g. for the
+	# history shards), adding its artwork doesn't count as using it, so films
+	# and books only stay in `artwork` while they're among the latest events
+	details = event.details._asdict()
+	key = artwork_key(event.details)
+	if key is not None:
+		artwork_url = use_artwork(key, shown)
+		if artwork_url:
+			details[ARTWORK_FIELDS[type(event.details)][1]] = artwork_url
+	return {
+		"url": event.url,
+		"datetime": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(event.timestamp)),
+		"title": event.title,
+		"type": event.type,
+		"details": details
+	}
+
+
+# Persisted between runs (see the cache step in `daily.yml`)
+CACHE_DIR = os.environ.get("RSS_CACHE_DIR", "./.cache")
+# Each profile's output goes to `<OUTPUT_DIR>/<profile>/` (see `write_output()`),
+# along with the timings and counts of the run in `rss-report.json`
+OUTPUT_DIR = os.environ.get("RSS_OUTPUT_DIR", "./public")
+# 0-11; rss.json is written once per run and downloaded on every page load,
+# so it's worth compressing as much as we can
+BROTLI_QUALITY = int(os.environ.get("RSS_BROTLI_QUALITY", "11"))
+# ...but the shards (see `write_output()`) hold every stored event, and are
+# downloaded far less often, so they're compressed quicker
+SHARD_BROTLI_QUALITY = int(os.environ.get("RSS_SHARD_BROTLI_QUALITY", "5"))
+HTTP_CACHE_PATH = os.path.join(CACHE_DIR, "http.json")
+OUTPUT_HASHES_PATH = os.path.join(CACHE_DIR, "output.json")
+STORE_PATH = os.path.join(CACHE_DIR, "events.db")
+# Bumped whenever the store's tables change
+STORE_VERSION = 10
+# Every response body read is kept here, so `replay` can parse it again later
+# (see `archive_body()`); bodies no run has read for `ARCHIVE_DAYS` are removed
+ARCHIVE = os.environ.get("RSS_ARCHIVE", "1") == "1"
+ARCHIVE_DIR = os.path.join(CACHE_DIR, "archive")
+ARCHIVE_DAYS = int(os.environ.get("RSS_ARCHIVE_DAYS", "90"))
+# Days an event's identity is remembered (see `seen`). Parsers leave out items
+# older than the cutoff anyway, so this only needs to be longer than that
+SEEN_DAYS = int(os.environ.get("RSS_SEEN_DAYS", "60"))
+# Most posters and covers remembered (see `artwork`); the ones shown least
+# recently are forgotten first
+ARTWORK_CACHE_SIZE = int(os.environ.get("RSS_ARTWORK_CACHE_SIZE", "5000"))
+
+
+def load_cache(path):
+	try:
+		with open(path, "r", encoding="utf-8") as f:
+			return json.load(f)
+	except (FileNotFoundError, json.JSONDecodeError):
+		return {}
+
+
+def save_cache(path, data):
+	os.makedirs(CACHE_DIR, exist_ok=True)
+	with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+		json.dump(data, f)
+	os.replace(f"{path}.tmp", path)
+
+
+def save_http_cache():
+	with http_cache_lock:
+		save_cache(HTTP_CACHE_PATH, http_cache)
+
+
+# URL -> { "etag", "last_modified", "entries" } from the last time it changed
+http_cache = {}
+http_cache_lock = threading.Lock()
+# Output file (relative to `OUTPUT_DIR`) -> { "sha256", "updated_at" }: hash of
+# the events last written to it, and when they last changed. Kept with the
+# cache rather than next to the output, since CI starts from a fresh checkout
+output_hashes = {}
+
+
+def open_store():
+	os.makedirs(CACHE_DIR, exist_ok=True)
+	store = sqlite3.connect(STORE_PATH, check_same_thread=False)
+	# Stores from before the tables last changed are started over; the next
+	# run reads every feed in full again (or reuses `http_cache`)
+	version = store.execute("PRAGMA user_version").fetchone()[0]
+	if version < STORE_VERSION:
+		store.executescript("""
+			DROP TABLE IF EXISTS events;
+			DROP TABLE IF EXISTS feeds;
+			DROP TABLE IF EXISTS seen;
+			DROP TABLE IF EXISTS archive;
+			DROP TABLE IF EXISTS artwork;
+		""")
+		# Nothing indexes the old archived bodies anymore
+		shutil.rmtree(ARCHIVE_DIR, ignore_errors=True)
+	store.executescript(f"""
+		PRAGMA user_version = {STORE_VERSION};
+		-- Every event ever collected, by the feed it was read from
+		CREATE TABLE IF NOT EXISTS events (
+			feed TEXT NOT NULL,
+			source TEXT NOT NULL,
+			url TEXT NOT NULL,
+			type TEXT NOT NULL,
+			event TEXT NOT NULL,
+			timestamp INTEGER NOT NULL,
+			title TEXT,
+			-- Name of the `details` class, and its fields as a JSON array
+			details_type TEXT NOT NULL,
+			details TEXT NOT NULL,
+			-- Whether a newer event with the same identity is shown instead
+			-- (see `sort_duplicates()`)
+			superseded INTEGER NOT NULL,
+			-- See `VARIANT_FIELDS`; blank for most events
+			variant TEXT NOT NULL,
+			PRIMARY KEY (feed, url, type, event, variant)
+		);
+		CREATE INDEX IF NOT EXISTS events_by_feed ON events (feed, timestamp);
+		-- Timestamp of the newest event seen in each feed, how its last
+		-- fetch went, and how often it's fetched (see `check_feed()`)
+		CREATE TABLE IF NOT EXISTS feeds (
+			url TEXT PRIMARY KEY,
+			newest INTEGER NOT NULL,
+			checked_at INTEGER NOT NULL,
+			failed INTEGER NOT NULL,
+			interval INTEGER NOT NULL,
+			gap INTEGER NOT NULL
+		);
+		-- Hashed identity (see `identity_key()`) of every recent event, and
+		-- which stored event has it
+		CREATE TABLE IF NOT EXISTS seen (
+			key INTEGER PRIMARY KEY,
+			feed TEXT NOT NULL,
+			url TEXT NOT NULL,
+			type TEXT NOT NULL,
+			event TEXT NOT NULL,
+			variant TEXT NOT NULL,
+			timestamp INTEGER NOT NULL
+		);
+		-- Every response body archived (see `archive_body()`), by the run
+		-- (its `STARTED_AT`) and feed it was read for
+		CREATE TABLE IF NOT EXISTS archive (
+			run INTEGER NOT NULL,
+			source TEXT NOT NULL,
+			feed TEXT NOT NULL,
+			-- 1 for the feed's own URL, then its further pages in order
+			page INTEGER NOT NULL,
+			url TEXT NOT NULL,
+			-- What the parser was given, so a replay stops where it did
+			cutoff INTEGER NOT NULL,
+			sha256 TEXT NOT NULL,
+			-- Uncompressed
+			bytes INTEGER NOT NULL,
+			PRIMARY KEY (run, feed, page)
+		);
+		CREATE INDEX IF NOT EXISTS archive_by_source ON archive (source, run);
+		-- Poster or cover of each film and book (see `artwork`)
+		CREATE TABLE IF NOT EXISTS artwork (
+			key TEXT PRIMARY KEY,
+			url TEXT NOT NULL,
+			used_at INTEGER NOT NULL
+		);
+	""")
+	return store
+
+
+def store_events(feed, source, entries, superseded=False):
+	# An event seen again replaces the stored one, unless that one is newer
+	store.executemany(
+		"""
+		INSERT INTO events (feed, url, type, event, variant, source, timestamp, title, details_type, details, superseded)
+		VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+		ON CONFLICT (feed, url, type, event, variant) DO UPDATE SET
+			source = excluded.source,
+			timestamp = excluded.timestamp,
+			title = excluded.title,
+			details_type = excluded.details_type,
+			details = excluded.details,
+			superseded = excluded.superseded
+		WHERE excluded.timestamp >= events.timestamp
+		""",
+		[
+			(
+				*stored_key(feed, entry),
+				source,
+				entry.timestamp,
+				entry.title,
+				type(entry.details).__name__,
+				json.dumps(entry.details),
+				superseded
+			)
+			for entry in entries
+		]
+	)
+
+
+def iter_events(feed_urls, since=0, superseded=True):
+	# Lazily yields the stored events read from any of `feed_urls` with a
+	# timestamp of at least `since`, newest first; rows are only read as
+	# they're consumed. Without `superseded`, events superseded by a newer one
+	# with the same identity (see `sort_duplicates()`) are left out
+	rows = store.execute(
+		f"""
+		SELECT url, timestamp, title, type, details_type, details FROM events
+		WHERE feed IN ({", ".join("?" * len(feed_urls))}) AND timestamp >= ?
+		{"" if superseded else "AND NOT superseded"}
+		ORDER BY timestamp DESC, rowid
+		""",
+		(*feed_urls, since)
+	)
+	for url, timestamp, title, type, details_type, details in rows:
+		yield Event(url, timestamp, title, type, DETAILS_TYPES[details_type](*json.loads(details)))
+
+
+def load_events(feed_urls, since=0):
+	with store_lock:
+		return list(iter_events(feed_urls, since=since))
+
+
+def load_feeds():
+	rows = store.execute("SELECT url, newest, checked_at, failed, interval, gap FROM feeds")
+	return {
+		url: {
+			"newest": newest,
+			"checked_at": checked_at,
+			"failed": bool(failed),
+			"interval": interval,
+			"gap": gap,
+		}
+		for url, newest, checked_at, failed, interval, gap in rows
+	}
+
+
+def save_feeds():
+	store.executemany(
+		"""
+		INSERT OR REPLACE INTO feeds (url, newest, checked_at, failed, interval, gap)
+		VALUES (:url, :newest, :checked_at, :failed, :interval, :gap)
+		""",
+		[ { "url": url, **feed } for url, feed in feeds.items() ]
+	)
+
+
+def load_seen():
+	rows = store.execute("SELECT key, feed, url, type, event, variant, timestamp FROM seen")
+	return { key: tuple(row) for key, *row in rows }
+
+
+def save_seen(run):
+	# Identities of events older than `SEEN_DAYS` before `run` (when the run
+	# started) are forgotten
+	oldest = run - SEEN_DAYS * 24 * 60 * 60
+	for key in [ key for key, row in seen.items() if row[-1] < oldest ]:
+		del seen[key]
+	store.execute("DELETE FROM seen WHERE timestamp < ?", (oldest,))
+	store.executemany(
+		"INSERT OR REPLACE INTO seen (key, feed, url, type, event, variant, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?)",
+		[ (key, *row) for key, row in seen.items() ]
+	)
+
+
+def sort_duplicates(feed, scope, source, entries):
+	# Splits the entries into the ones to show, and the ones superseded by a
+	# newer event of `scope` with the same identity (see `Source.identity`).
+	# An entry newer than the stored event with its identity supersedes that
+	# one instead, so the newest one is always the one shown. Superseded
+	# events are still stored, so the history stays complete
+	identity = SOURCES[source].identity
+	# Identity key -> entry, since a newer entry may supersede an earlier one
+	shown = {}
+	superseded = []
+	for entry in entries:
+		key = identity_key(scope, identity(entry))
+		row = (*stored_key(feed, entry), entry.timestamp)
+		other = seen.get(key)
+		# i.e. not just the same event again
+		duplicate = other is not None and other[:-1] != row[:-1]
+		if duplicate:
+			count(feed, "duplicates")
+		# Of two events at the same time, the one stored first stays
+		if other is not None and (entry.timestamp < other[-1] or duplicate and entry.timestamp == other[-1]):
+			if duplicate:
+				superseded.append(entry)
+			continue
+		if duplicate:
+			store.execute(
+				"UPDATE events SET superseded = 1 WHERE feed = ? AND url = ? AND type = ? AND event = ? AND variant = ?",
+				other[:-1]
+			)
+			# ...or it's from this same batch, and not stored yet
+			if key in shown:
+				superseded.append(shown.pop(key))
+		seen[key] = row
+		shown[key] = entry
+	return list(shown.values()), superseded
+
+
+def load_artwork():
+	rows = store.execute("SELECT key, url, used_at FROM artwork")
+	return { key: [ url, used_at ] for key, url, used_at in rows }
+
+
+def save_artwork():
+	# Only the `ARTWORK_CACHE_SIZE` most recently shown are kept
+	with artwork_lock:
+		evicted = sorted(artwork, key=lambda key: artwork[key][1])[:max(0, len(artwork) - ARTWORK_CACHE_SIZE)]
+		for key in evicted:
+			del artwork[key]
+		rows = [ (key, url, used_at) for key, (url, used_at) in artwork.items() ]
+	with store:
+		store.executemany("DELETE FROM artwork WHERE key = ?", [ (key,) for key in evicted ])
+		store.executemany("INSERT OR REPLACE INTO artwork (key, url, used_at) VALUES (?, ?, ?)", rows)
+
+
+def knows_artwork(key):
+	with artwork_lock:
+		return key in artwork
+
+
+def remember_artwork(key, url):
+	if url:
+		with artwork_lock:
+			artwork[key] = [ url, STARTED_AT ]
+
+
+def use_artwork(key, shown=True):
+	# The poster or cover URL of `key` (e.g. "tmdb_id:615453"), if we know it.
+	# With `shown`, it's kept as recently used (see `save_artwork()`)
+	with artwork_lock:
+		known = artwork.get(key)
+		if known is None:
+			return None
+		if shown:
+			known[1] = STARTED_AT
+		return known[0]
+
+
+def check_feed(url, source, failed, newest=0):
+	# Also works out how long until the feed is fetched again: after it had
+	# something new, half of how far apart its new events have been (see
+	# `POLLS_PER_EVENT`), and after it didn't, or failed, longer than last time
+	ttl = SOURCES[source].ttl
+	feed = feeds.setdefault(url, { "newest": 0, "interval": 0, "gap": 0 })
+	interval = feed["interval"] or ttl
+	if failed:
+		interval *= FAILED_BACKOFF
+	elif newest > feed["newest"]:
+		if feed["newest"]:
+			# Averaged with the previous gaps, so one burst of events doesn't
+			# undo everything learned so far
+			gap = newest - feed["newest"]
+			feed["gap"] = (feed["gap"] + gap) // 2 if feed["gap"] else gap
+			interval = feed["gap"] / POLLS_PER_EVENT
+		feed["newest"] = newest
 	else:
-		res = requests.get(url=url)
-	print(f"Response status: HTTP {res.status_code}")
-	if res.status_code >= 400:
+		interval *= QUIET_BACKOFF
+	feed["interval"] = int(min(max(interval, ttl), MAX_INTERVAL))
+	feed["checked_at"] = STARTED_AT
+	feed["failed"] = failed
+	record(url, interval_s=feed["interval"])
+
+
+def next_check(url, source, adaptive=True):
+	# When `url` is due to be fetched again; never fetched ones are due now.
+	# Without `adaptive`, the interval learned for it is ignored
+	feed = feeds.get(url)
+	if feed is None:
+		return 0
+	ttl = SOURCES[source].ttl
+	return feed["checked_at"] + (max(feed["interval"], ttl) if adaptive else ttl)
+
+
+# Everything we collect is merged into this store, so events that drop off
+# their feed's window aren't lost, and each run only needs to read what's new
+store = None
+store_lock = threading.Lock()
+# Feed URL -> { "newest", "checked_at", "failed" }: timestamp of the newest
+# event read from it, and when and how it was last fetched
+feeds = {}
+# Identity key -> `stored_key()` and timestamp of the stored event with
+# that identity, for every event newer than `SEEN_DAYS`
+seen = {}
+# Key (see `ARTWORK_FIELDS`) -> [ poster or cover URL, when it was last shown ]
+# of each film and book we've seen. Parsers only look for it the first time
+# one is seen, and it's added to the output from here
+artwork = {}
+artwork_lock = threading.Lock()
+# Rows of `archive` for the bodies archived this run, indexed on `merge()`
+archived = []
+archived_lock = threading.Lock()
+
+
+def load_state():
+	# Opens the store and reads the caches. Not done on import, so that
+	# importing this (e.g. from `bench.py`) or checking the options is cheap
+	global store, feeds, seen, artwork, http_cache, output_hashes
+	store = open_store()
+	feeds = load_feeds()
+	seen = load_seen()
+	artwork = load_artwork()
+	http_cache = load_cache(HTTP_CACHE_PATH)
+	output_hashes = load_cache(OUTPUT_HASHES_PATH)
+
+
+def new_feed_metrics(source, page_of=None):
+	return {
+		"source": source,
+		# For pages after the first, the feed's URL
+		"page_of": page_of,
+		# "fetched", "not-modified", "skipped" (see `next_check()`) or "failed"
+		"outcome": None,
+		"status": None,
+		# Seconds from starting to read the feed to having its entries
+		"fetch_s": 0.0,
+		"requests": 0,
+		# Seconds, summed over every request (including retries): opening a
+		# connection, then waiting for the headers, then reading the body. XML
+		# is parsed while it's read, so that's in `download_s` too
+		"connect_s": 0.0,
+		"ttfb_s": 0.0,
+		"download_s": 0.0,
+		"parse_cpu_s": 0.0,
+		# As sent, i.e. possibly compressed
+		"bytes": 0,
+		# Items kept, and left out for being older than the cutoff or for not
+		# being worth showing (e.g. pushes). Newest-first feeds stop at the
+		# first old item, so `old` is at most 1 for them
+		"kept": 0,
+		"old": 0,
+		"skipped": 0,
+		# Entries with the same identity as another event, see `sort_duplicates()`
+		"duplicates": 0,
+		# Seconds until it's fetched again, see `check_feed()`
+		"interval_s": 0,
+	}
+
+
+# URL -> measurements of every request made this run, for `write_report()`
+feed_metrics = {}
+# Profile -> source -> counts, from `new_source_metrics()`
+source_metrics = {}
+metrics_lock = threading.Lock()
+
+
+def new_source_metrics():
+	return {
+		# Whether normalizing its feeds failed; `write_report()` adds how many
+		# of them (and of their pages) failed to be fetched
+		"failed": 0,
+		# New or updated entries read this run, and events in the output
+		"entries": 0,
+		"shown": 0,
+	}
+
+
+def track(url, source, page_of=None):
+	with metrics_lock:
+		feed_metrics.setdefault(url, new_feed_metrics(source, page_of))
+
+
+def count(url, key, amount=1):
+	with metrics_lock:
+		metrics = feed_metrics.setdefault(url, new_feed_metrics(None))
+		metrics[key] += amount
+
+
+def record(url, **values):
+	with metrics_lock:
+		feed_metrics.setdefault(url, new_feed_metrics(None)).update(values)
+
+
+def count_source(profile, source, key, amount=1):
+	with metrics_lock:
+		metrics = source_metrics.setdefault(profile, {}).setdefault(source, new_source_metrics())
+		metrics[key] += amount
+
+
+@contextlib.contextmanager
+def parse_timer(url, streamed):
+	# CPU time spent parsing `url`; a streamed body is read while it's parsed,
+	# so then the wall time is also how long downloading it took
+	started = time.perf_counter()
+	cpu_started = time.thread_time()
+	try:
+		yield
+	finally:
+		count(url, "parse_cpu_s", time.thread_time() - cpu_started)
+		if streamed:
+			count(url, "download_s", time.perf_counter() - started)
+
+
+def iter_xml(stream, tag, fields):
+	# Streams an XML document, yielding one flat `{ field: text }` record per
+	# <tag> element. Children are matched by local name, so e.g. both "title"
+	# and "letterboxd:filmTitle" can be asked for as "title" and "filmTitle".
+	# Every element is dropped as soon as it's read, so memory use doesn't grow
+	# with the size of the feed
+	from lxml import etree
+	for _, element in etree.iterparse(
+		stream,
+		events=("end",),
+		tag=f"{{*}}{tag}",
+		recover=True,
+		resolve_entities=False
+	):
+		record = dict.fromkeys(fields, "")
+		for child in element:
+			if not isinstance(child.tag, str):
+				continue
+			name = child.tag.rpartition("}")[2]
+			if name in record:
+				record[name] = child.text or ""
+		element.clear()
+		while element.getprevious() is not None:
+			del element.getparent()[0]
+		yield record
+
+
+def retry_delay(res, attempt):
+	# Seconds to wait before trying again, or None if it's not worth retrying
+	if res is None:
+		pass
+	# GitHub: out of requests until `X-RateLimit-Reset` (a Unix timestamp)
+	elif res.headers.get("X-RateLimit-Remaining") == "0" and res.status_code in (403, 429):
+		reset = res.headers.get("X-RateLimit-Reset", "")
+		if reset.isdigit():
+			return max(0, int(reset) - time.time()) + 1
+	elif res.status_code not in RETRY_STATUSES:
+		return None
+	# `Retry-After` is either a number of seconds or an HTTP date
+	elif "Retry-After" in res.headers:
+		retry_after = res.headers["Retry-After"].strip()
+		if retry_after.isdigit():
+			return int(retry_after)
+		try:
+			return max(0, timestamps.parse_rfc822(retry_after) - time.time())
+		except (TypeError, ValueError):
+			pass
+	# Exponential backoff, with jitter so that retries don't line up
+	backoff = RETRY_BASE_DELAY * 2 ** attempt
+	return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+def spend_retry_budget(delay):
+	global retry_budget_left
+	with retry_budget_lock:
+		if delay > retry_budget_left:
+			return False
+		retry_budget_left -= delay
+		return True
+
+
+def host_slot(url):
+	# Requests to the same host wait for one of its `MAX_CONNECTIONS_PER_HOST`
+	# slots before taking one of `fetch_slots`, so that e.g. many profiles'
+	# Letterboxd feeds don't hold up every other host while they queue
+	host = urllib.parse.urlsplit(url).hostname
+	with host_slots_lock:
+		if host not in host_slots:
+			host_slots[host] = threading.BoundedSemaphore(MAX_CONNECTIONS_PER_HOST)
+		return host_slots[host]
+
+
+def http_get(url, headers=None, stream=False, counted_as=None):
+	# `counted_as` is the URL the request is measured under (see `count()`), if
+	# not `url` itself, e.g. for a feed asked for with a query of its own
+	import http_client
+	connect_timing = http_client.connect_timing
+	counted_as = counted_as or url
+	for attempt in range(RETRY_ATTEMPTS):
+		with host_slot(url), fetch_slots:
+			connect_timing.seconds = 0
+			started = time.perf_counter()
+			try:
+				res = get_session().get(url=url, headers=headers, timeout=HTTP_TIMEOUT, stream=stream)
+			except http_client.RequestException as e:
+				print(f"Request to '{url}' failed: {e}")
+				res = None
+			elapsed = time.perf_counter() - started
+		count(counted_as, "requests")
+		count(counted_as, "connect_s", connect_timing.seconds)
+		if res is not None:
+			# `elapsed` is up to the headers; the body is only read here if
+			# it's not streamed
+			headers_at = res.elapsed.total_seconds()
+			count(counted_as, "ttfb_s", headers_at - connect_timing.seconds)
+			if not stream:
+				count(counted_as, "download_s", elapsed - headers_at)
+			record(counted_as, status=res.status_code)
+
+		delay = retry_delay(res, attempt)
+		if delay is None:
+			return res
+		if attempt == RETRY_ATTEMPTS - 1:
+			print(f"Giving up on '{url}' after {RETRY_ATTEMPTS} tries")
+			return res
+		if delay > RETRY_MAX_DELAY or not spend_retry_budget(delay):
+			print(f"Giving up on '{url}'; retrying would mean waiting {delay:.1f}s")
+			return res
+		# Waiting happens outside of `fetch_slots`, so other sources can
+		# use the slot in the meantime
+		if res is not None:
+			res.close()
+		print(f"Retrying '{url}' in {delay:.1f}s")
+		time.sleep(delay)
+	return res
+
+
+def page_urls(last_url):
+	# Every page up to the one in a `rel="last"` link, which only differ from it
+	# in their `page` query parameter
+	parts = urllib.parse.urlsplit(last_url)
+	query = urllib.parse.parse_qs(parts.query)
+	last_page = int(query["page"][0])
+	for page in range(2, last_page + 1):
+		query["page"] = [ str(page) ]
+		yield parts._replace(query=urllib.parse.urlencode(query, doseq=True)).geturl()
+
+
+def archive_path(digest):
+	return os.path.join(ARCHIVE_DIR, digest[:2], f"{digest}.gz")
+
+
+def archive_file(source, feed, url, page, cutoff, temp_path, digest, size):
+	# Bodies are stored by their SHA-256, so a feed that didn't change since
+	# the last run takes no more space; only its row in `archive` is added
+	path = archive_path(digest)
+	if os.path.exists(path):
+		os.remove(temp_path)
+	else:
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		os.replace(temp_path, path)
+	with archived_lock:
+		archived.append((STARTED_AT, source, feed, page, url, cutoff, digest, size))
+
+
+def archive_temp_path():
+	os.makedirs(ARCHIVE_DIR, exist_ok=True)
+	return os.path.join(ARCHIVE_DIR, f"{threading.get_ident()}.tmp")
+
+
+def archive_body(source, feed, url, body, cutoff, page=1):
+	temp_path = archive_temp_path()
+	with open(temp_path, "wb") as f:
+		f.write(gzip.compress(body, mtime=0))
+	archive_file(source, feed, url, page, cutoff, temp_path, hashlib.sha256(body).hexdigest(), len(body))
+
+
+class ArchivedBody:
+	# Reads `stream` for a parser, archiving what it reads as it goes: it's
+	# compressed straight into a file, so memory use still doesn't grow with
+	# the body. Only what the parser read is kept, i.e. up to the cutoff,
+	# which is what a replay reads again (see `replay_feed()`)
+	def __init__(self, stream, source, url, cutoff):
+		self.stream = stream
+		self.source = source
+		self.url = url
+		self.cutoff = cutoff
+		self.sha256 = hashlib.sha256()
+		self.size = 0
+		self.temp_path = archive_temp_path()
+		self.file = gzip.GzipFile(self.temp_path, "wb", mtime=0)
+
+	def read(self, size=-1):
+		chunk = self.stream.read(size)
+		self.sha256.update(chunk)
+		self.size += len(chunk)
+		self.file.write(chunk)
+		return chunk
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, error_type, *_):
+		self.file.close()
+		if error_type is not None:
+			os.remove(self.temp_path)
+			return
+		archive_file(
+			self.source, self.url, self.url, 1, self.cutoff,
+			self.temp_path, self.sha256.hexdigest(), self.size
+		)
+
+
+def save_archive(run):
+	# Indexes this run's bodies, and removes the ones no run in the
+	# `ARCHIVE_DAYS` before `run` has read
+	with archived_lock:
+		rows = list(archived)
+		archived.clear()
+	store.executemany(
+		"""
+		INSERT OR REPLACE INTO archive (run, source, feed, page, url, cutoff, sha256, bytes)
+		VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+		""",
+		rows
+	)
+	oldest = run - ARCHIVE_DAYS * 24 * 60 * 60
+	expired = store.execute("SELECT DISTINCT sha256 FROM archive WHERE run < ?", (oldest,)).fetchall()
+	store.execute("DELETE FROM archive WHERE run < ?", (oldest,))
+	for (digest,) in expired:
+		if store.execute("SELECT 1 FROM archive WHERE sha256 = ?", (digest,)).fetchone() is None:
+			with contextlib.suppress(FileNotFoundError):
+				os.remove(archive_path(digest))
+
+
+@contextlib.contextmanager
+def open_archived(digest):
+	# An archived body, as a stream the parsers can read. The file is
+	# memory-mapped and decompressed as it's read, so neither it nor the body
+	# is ever loaded whole
+	with open(archive_path(digest), "rb") as f:
+		with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+			with gzip.GzipFile(fileobj=mapped) as body:
+				yield body
+
+
+def with_query(url, params):
+	# `url` with `params` added to its query string
+	parts = urllib.parse.urlsplit(url)
+	query = "&".join(filter(None, (parts.query, urllib.parse.urlencode(params))))
+	return parts._replace(query=query).geturl()
+
+
+def api_error(document, continued=False):
+	# MediaWiki answers a query it couldn't run (e.g. an unknown user or a bad
+	# parameter) with a 200 and an "error" instead of results
+	# [Ref] https://www.mediawiki.org/wiki/API:Errors_and_warnings
+	if continued and "error" in document:
+		error = document["error"]
+		return f"{error.get('code')}: {error.get('info')}" if isinstance(error, dict) else str(error)
+	return None
+
+
+def json_items(document, continued=False):
+	# The items of a JSON response: the response itself, or for a MediaWiki
+	# API query (see `fetch_entries()`), the one list it asked for
+	if continued:
+		return iter(next(iter(document.get("query", {}).values()), []))
+	return iter(document)
+
+
+def fetch_page(url, parse, headers, cutoff, ordered, source, page_of, page, continued=False):
+	# Returns the page's entries and the whole document, or (None, None)
+	res = http_get(url, headers=headers)
+	if res is None:
+		record(url, outcome="failed")
+		return None, None
+	with res:
+		if res.status_code >= 400:
+			record(url, outcome="failed")
+			return None, None
+		res.encoding = "utf-8"
+		with parse_timer(url, streamed=False):
+			document = res.json()
+			error = api_error(document, continued)
+			if error is None:
+				entries = parse(json_items(document, continued), url, cutoff, ordered)
+		if error is not None:
+			print(f"Reading '{url}' failed: {error}")
+			record(url, outcome="failed")
+			return None, None
+		if ARCHIVE:
+			archive_body(source, page_of, url, res.content, cutoff, page=page)
+		count(url, "bytes", res.raw.tell())
+	count(url, "kept", len(entries))
+	record(url, outcome="fetched")
+	return entries, document
+
+
+def fetch_entries(
+	url, parse, source, headers=None, as_json=False, paginate=False, continued=False, query=None,
+	adaptive=False,
+):
+	# With `paginate`, a JSON endpoint's `Link` header is followed to read the
+	# pages after the first one, unless the first already reached the cutoff.
+	# With `continued`, it's a MediaWiki API query, whose `continue` parameters
+	# are followed instead. `query(cutoff)` gives parameters to add to this
+	# run's request, e.g. to only list what's newer than the cutoff; the feed
+	# is still known by `url` alone. With `adaptive`, it's skipped until the
+	# interval learned for it passes (see `next_check()`), not just its `ttl`
+	track(url, source)
+	feed = feeds.get(url, { "newest": 0, "checked_at": 0, "failed": False })
+	age = STARTED_AT - feed["checked_at"]
+	if STARTED_AT < next_check(url, source, adaptive):
+		status = "failed" if feed["failed"] else "was fetched"
+		print(f"Skipping '{url}'; it {status} {age}s ago, serving stored events")
+		record(url, outcome="skipped")
+		return []
+
+	# Anything older than the newest event we already have from this feed is
+	# already in the store, so only newer items are read
+	cutoff = max(CUTOFF, feed["newest"])
+	ordered = SOURCES[source].ordered
+
+	# Conditional GET: if a previous run stored validators for this URL, an
+	# HTTP 304 means we can reuse the entries it parsed back then
+	cached = http_cache.get(url)
+	conditional_headers = dict(headers or {})
+	if cached:
+		if cached["etag"]:
+			conditional_headers["If-None-Match"] = cached["etag"]
+		if cached["last_modified"]:
+			conditional_headers["If-Modified-Since"] = cached["last_modified"]
+
+	request_url = with_query(url, query(cutoff)) if query else url
+	# XML is parsed straight off the socket (see `iter_xml()`)
+	res = http_get(request_url, headers=conditional_headers, stream=not as_json, counted_as=url)
+	if res is None:
+		check_feed(url, source, failed=True)
+		record(url, outcome="failed")
 		return
-	res.encoding = "utf-8"
-	print(f"Got response of size '{len(res.text)}'")
-	return BeautifulSoup(res.text, "xml")
+	with res:
+		if res.status_code >= 400 or (res.status_code == 304 and not cached):
+			check_feed(url, source, failed=True)
+			record(url, outcome="failed")
+			return
+		if res.status_code == 304:
+			check_feed(url, source, failed=False)
+			record(url, outcome="not-modified")
+			entries = [
+				entry
+				for entry in map(unpack_event, cached["entries"])
+				if entry.timestamp >= CUTOFF
+			]
+			count(url, "kept", len(entries))
+			return entries
+
+		more_pages = []
+		continuation = None
+		if as_json:
+			res.encoding = "utf-8"
+			with parse_timer(url, streamed=False):
+				document = res.json()
+				error = api_error(document, continued)
+				if error is None:
+					items = json_items(document, continued)
+					entries = parse(items, url, cutoff, ordered)
+			# Same as an HTTP error: the cursor and validators stay as they were
+			if error is not None:
+				print(f"Reading '{url}' failed: {error}")
+				check_feed(url, source, failed=True)
+				record(url, outcome="failed")
+				return
+			if ARCHIVE:
+				archive_body(source, url, request_url, res.content, cutoff)
+			# If the parser stopped before the end of the page, it reached the
+			# cutoff, and the following pages are even older
+			if next(items, None) is None:
+				if paginate and "last" in res.links:
+					more_pages = list(page_urls(res.links["last"]["url"]))
+				if continued:
+					continuation = document.get("continue")
+		else:
+			# Undo gzip/brotli while reading
+			res.raw.decode_content = True
+			archiving = ArchivedBody(res.raw, source, url, cutoff) if ARCHIVE else contextlib.nullcontext(res.raw)
+			with archiving as body, parse_timer(url, streamed=True):
+				entries = parse(body, url, cutoff, ordered)
+		count(url, "bytes", res.raw.tell())
+	count(url, "kept", len(entries))
+
+	# The remaining pages are all requested at once. Pages past the cutoff
+	# come back empty, as their parser stops at the first item
+	pages = []
+	if more_pages:
+		for page_url in more_pages:
+			track(page_url, source, page_of=url)
+		with ThreadPoolExecutor(max_workers=len(more_pages)) as pool:
+			pages = [
+				page
+				for page, _ in pool.map(
+					lambda page, page_url: fetch_page(page_url, parse, headers, cutoff, ordered, source, url, page),
+					itertools.count(2),
+					more_pages
+				)
+			]
+	# A MediaWiki query's next page is only known once the previous one is
+	# read, so those are requested one at a time
+	page = 1
+	while continuation:
+		page += 1
+		page_url = with_query(request_url, continuation)
+		track(page_url, source, page_of=url)
+		page_entries, document = fetch_page(
+			page_url, parse, headers, cutoff, ordered, source, url, page, continued=True
+		)
+		pages.append(page_entries)
+		continuation = document and document.get("continue")
+	for page_entries in pages:
+		entries.extend(page_entries or [])
+	# Keep the cursor and validators where they were, so that next time the
+	# missing pages are read again
+	if any(page_entries is None for page_entries in pages):
+		print(f"Failed reading some pages after '{url}'")
+		check_feed(url, source, failed=True)
+		record(url, outcome="failed")
+		return entries
+
+	check_feed(url, source, failed=False, newest=max((entry.timestamp for entry in entries), default=0))
+	record(url, outcome="fetched")
+
+	etag = res.headers.get("ETag")
+	last_modified = res.headers.get("Last-Modified")
+	with http_cache_lock:
+		if etag or last_modified:
+			http_cache[url] = {
+				"etag": etag,
+				"last_modified": last_modified,
+				"entries": [ pack_event(entry) for entry in entries ]
+			}
+		else:
+			http_cache.pop(url, None)
+	return entries
+
+
+def fetch_feed(job):
+	# `fetch_entries()`, except that a feed that breaks (e.g. it changed
+	# format) is logged and treated as failed, instead of taking every other
+	# feed down with it
+	started = time.perf_counter()
+	try:
+		return fetch_entries(**job)
+	except Exception:
+		print(f"Reading '{job['url']}' failed:")
+		traceback.print_exc(file=sys.stdout)
+		record(job["url"], outcome="failed")
+	finally:
+		count(job["url"], "fetch_s", time.perf_counter() - started)
+
+
+def fetch_all_entries(jobs):
+	# Fetches every job (a dict of `fetch_entries()` arguments) at once; results
+	# keep the input order. The number of open requests is still capped by
+	# `fetch_slots` and `host_slot()`, and these threads mostly wait on them
+	if not jobs:
+		return []
+	with ThreadPoolExecutor(max_workers=min(len(jobs), MAX_CONCURRENCY * 4)) as pool:
+		return list(pool.map(fetch_feed, jobs))
 
 
 def std_datetime(date):
@@ -34,13 +1246,17 @@ def std_datetime(date):
 	)
 
 
-def letterboxd():
-	soup = get_xml("https://letterboxd.com/matheusavellar/rss/")
-	if soup is None:
-		return []
+# The poster is the first thing in an item's <description>
+LETTERBOXD_POSTER = re.compile(r'<img src="([^"]+)"')
+
 
+def parse_letterboxd(stream, url, cutoff, ordered):
 	output = []
-	for review in soup.find_all("item"):
+	fields = (
+		"link", "pubDate", "watchedDate", "rewatch", "title",
+		"filmTitle", "filmYear", "memberRating", "movieId", "description"
+	)
+	for review in iter_xml(stream, "item", fields):
 		# <item>
 		# 	<title>Ne Zha, 2019 - ★★★½</title>
 		# 	<link>https://letterboxd.com/matheusavellar/film/ne-zha/</link>
@@ -62,30 +1278,34 @@ def letterboxd():
 		# 	</description>
 		# 	<dc:creator>Matheus Avellar</dc:creator>
 		# </item>
-		review_url = get_text(review.find("link"))
-		pubDate = get_text(review.find("pubDate"))
-		dt = datetime.datetime.strptime(pubDate, "%a, %d %b %Y %H:%M:%S %z")
+		review_url = review["link"]
+		pubDate = review["pubDate"]
+		timestamp = timestamps.parse_rfc822(pubDate)
 		# If this event is older than a month, ignore it
-		if dt < (datetime.datetime.now(tz=datetime.timezone.utc) - datetime.timedelta(days=30)):
+		if timestamp < cutoff:
+			count(url, "old")
+			# ...along with everything after it, if the feed is newest-first
+			if ordered:
+				break
 			continue
-		published_datetime = std_datetime(dt)
 
-		watched_date = get_text(review.find("letterboxd:watchedDate"))
-		is_rewatch = get_text(review.find("letterboxd:rewatch")) != "No"
+		watched_date = review["watchedDate"]
+		is_rewatch = review["rewatch"] != "No"
 		# <title> if list
-		title = get_text(review.find("title"))
+		title = review["title"]
 		# <letterboxd:filmTitle> if film
-		film_title = get_text(review.find("letterboxd:filmTitle"))
-		film_year = get_text(review.find("letterboxd:filmYear"))
-		rating = get_text(review.find("letterboxd:memberRating"))
-		tmdb_id = get_text(review.find("tmdb:movieId"))
-		description = get_text(review.find("description"))
-		# poster_url = (re.search(r"<img src=\"([^\"]+)\"", description) or [0,""])[1]
-
-		output.append({
-			"url": review_url,
-			"datetime": published_datetime,
-			"title": (
+		film_title = review["filmTitle"]
+		film_year = review["filmYear"]
+		rating = review["memberRating"]
+		tmdb_id = review["movieId"]
+		if tmdb_id and not knows_artwork(f"tmdb_id:{tmdb_id}"):
+			poster = LETTERBOXD_POSTER.search(review["description"])
+			remember_artwork(f"tmdb_id:{tmdb_id}", poster and poster[1])
+
+		output.append(Event(
+			url=review_url,
+			timestamp=timestamp,
+			title=(
 				f"{film_title} ({film_year})"
 				if film_title and film_year
 				else (
@@ -94,107 +1314,161 @@ def letterboxd():
 					else title
 				)
 			),
-			"type": "letterboxd",
-			"details": {
-				"event": "review" if film_title else "list",
-				**({
-					"watched_date": watched_date,
-					"is_rewatch": is_rewatch,
-					"raw_title": film_title,
-					"raw_year": film_year,
-					"rating": rating,
-					"tmdb_id": tmdb_id,
-				} if film_title else {})
-			}
-		})
-	print(f"Finished reading XML; got {len(output)} entries. Limiting to latest 10")
-	output.sort(reverse=True, key=lambda obj: datetime.datetime.fromisoformat(obj["datetime"]))
+			type="letterboxd",
+			details=(
+				LetterboxdReview(
+					event="review",
+					watched_date=watched_date,
+					is_rewatch=is_rewatch,
+					raw_title=film_title,
+					raw_year=film_year,
+					rating=rating,
+					tmdb_id=tmdb_id,
+				)
+				if film_title
+				else LetterboxdList(event="list")
+			)
+		))
 	return output
 
 
-def wikipedia():
-	params = "action=feedcontributions&feedformat=atom&user=Avelludo"
-	urls = [
-		f"https://en.wikipedia.org/w/api.php?{params}",
-		f"https://commons.wikimedia.org/w/api.php?{params}",
-		f"https://pt.wikipedia.org/w/api.php?{params}",
+LETTERBOXD_FEEDS = [
+	{
+		"url": "https://letterboxd.com/{user}/rss/",
+		"parse": parse_letterboxd,
+	},
+]
+
+
+def compile_prefixes(table):
+	# Turns a `{ event: (prefixes, ignore_case) }` table into a single regex
+	# that tells, in one pass, which event a string starts like (see
+	# `classify_prefix()`). Earlier entries win when several match
+	groups = [
+		f"({'(?i:' if ignore_case else '(?:'}{'|'.join(map(re.escape, prefixes))}))"
+		for prefixes, ignore_case in table.values()
 	]
+	return re.compile("|".join(groups)), list(table)
+
+
+def classify_prefix(compiled, text, default):
+	regex, events = compiled
+	match = regex.match(text)
+	return events[match.lastindex - 1] if match else default
+
+
+# Edits to structured data
+WIKI_SKIPPED_EDITS = { "/* wbeditentity-update:0| */" }
+# Kind of edit, by how its description starts (in any of the wikis' languages);
+# anything else is "edit-page"
+WIKI_EDIT_PREFIXES = compile_prefixes({
+	"file-upload": (("Uploaded a work",), False),
+	"create-article": ((
+		"create article", "create category", "create draft",
+		"cria artigo", "cria categoria", "cria rascunho",
+	), True),
+})
+
+
+def classify_wiki_edit(description):
+	return classify_prefix(WIKI_EDIT_PREFIXES, description, "edit-page")
+
+
+def wiki_title_url(title):
+	# As MediaWiki writes page titles in URLs ("Brazilian_real", "File:X.jpg")
+	return urllib.parse.quote(title.replace(" ", "_"), safe=";@$!*(),/~:")
+
+
+def parse_wikipedia(items, url, cutoff, ordered):
 	output = []
-	default_headers = requests.utils.default_headers() 
-	default_ua = default_headers["User-Agent"] if "User-Agent" in default_headers else ""
-	custom_ua = f"AvelludoRSS/0.0 (https://en.wikipedia.org/wiki/User:Avelludo; selfrss@avl.la) {default_ua}".strip()
-
-	for url in urls:
-		# [Ref] https://foundation.wikimedia.org/wiki/Policy:Wikimedia_Foundation_User-Agent_Policy
-		soup = get_xml(url, headers={ "User-Agent": custom_ua })
-		if soup is None:
+	host = urllib.parse.urlsplit(url).netloc
+	for contribution in items:
+		# {
+		# 	"userid": 11442270,
+		# 	"user": "Avelludo",
+		# 	"pageid": 26799,
+		# 	"revid": 1303551938,
+		# 	"parentid": 1302900000,
+		# 	"ns": 0,
+		# 	"title": "Brazilian real",
+		# 	"timestamp": "2025-07-31T17:23:10Z",
+		# 	"comment": "..."
+		# }
+		timestamp = timestamps.parse_iso8601(contribution["timestamp"])
+		# If this event is older than a month, ignore it
+		if timestamp < cutoff:
+			count(url, "old")
+			# ...along with everything after it, if the feed is newest-first
+			if ordered:
+				break
+			continue
+		# Hidden comments have no "comment" at all
+		edit_description = contribution.get("comment", "").strip()
+		if edit_description in WIKI_SKIPPED_EDITS:
+			count(url, "skipped")
 			continue
+		event = classify_wiki_edit(edit_description)
 
-		for entry in soup.find_all("entry"):
-			# <entry>
-			# 	<id>https://en.wikipedia.org/w/index.php?title=Brazilian_real&diff=1303551938</id>
-			# 	<title>Brazilian real</title>
-			# 	<link rel="alternate" type="text/html" href="https://en.wikipedia.org/w/index.php?title=Brazilian_real&diff=1303551938"/>
-			# 	<updated>2025-07-31T17:23:10Z</updated>
-			# 	<summary type="html">
-			# 		<p>Avelludo: ...</p> <hr />...
-			# 	</summary>
-			# 	<author><name>Avelludo</name></author>
-			# </entry>
-			edit_url = get_text(entry.find("id"))
-			page_title = get_text(entry.find("title"))
-			updated = get_text(entry.find("updated"))
-			dt = datetime.datetime.strptime(updated, "%Y-%m-%dT%H:%M:%S%z")
-			# If this event is older than a month, ignore it
-			if dt < (datetime.datetime.now(tz=datetime.timezone.utc) - datetime.timedelta(days=30)):
-				continue
-			edit_datetime = std_datetime(dt)
-			summary = get_text(entry.find("summary"))
-			edit_description = (
-				summary
-				.removeprefix("<p>Avelludo: ")
-				.split("</p>")[0]
-				.strip()
+		page_title = contribution["title"]
+		output.append(Event(
+			url=f"https://{host}/w/index.php?title={wiki_title_url(page_title)}&diff={contribution['revid']}",
+			timestamp=timestamp,
+			title=page_title,
+			type="wiki",
+			details=WikiEdit(
+				event=event,
+				kind=host.split(".")[0],
+				description=edit_description
 			)
-			# Edits to structured data
-			if edit_description == "/* wbeditentity-update:0| */":
-				continue
-
-			event = "edit-page"
-			if edit_description.startswith("Uploaded a work"):
-				event = "file-upload";
-			elif edit_description.lower().startswith("create article") \
-				or edit_description.lower().startswith("create category") \
-				or edit_description.lower().startswith("create draft") \
-				or edit_description.lower().startswith("cria artigo") \
-				or edit_description.lower().startswith("cria categoria") \
-				or edit_description.lower().startswith("cria rascunho"):
-				event = "create-article";
-
-			wiki_prefix = url.removeprefix("https://").split(".")[0]
-			output.append({
-				"url": edit_url,
-				"datetime": edit_datetime,
-				"title": page_title,
-				"type": "wiki",
-				"details": {
-					"event": event,
-					"kind": wiki_prefix,
-					"description": edit_description
-				}
-			})
-	print(f"Finished reading XML; got {len(output)} entries. Limiting to latest 10")
-	output.sort(reverse=True, key=lambda obj: datetime.datetime.fromisoformat(obj["datetime"]))
+		))
 	return output
 
 
-def mal():
-	soup = get_xml("https://myanimelist.net/rss.php?type=rwe&u=Beta-Tester")
-	if soup is None:
-		return []
+# Every edit of a user, newest first, as JSON
+# [Ref] https://www.mediawiki.org/wiki/API:Usercontribs
+WIKI_PARAMS = (
+	"action=query&format=json&formatversion=2&list=usercontribs&ucuser={user}"
+	"&uclimit=max&ucprop=ids%7Ctitle%7Ctimestamp%7Ccomment"
+)
+# Namespaces whose edits are listed ("*" for all of them, or e.g. "0|6|14"),
+# and a change tag they must have, if any; the wikis filter them themselves
+WIKI_NAMESPACES = os.environ.get("RSS_WIKI_NAMESPACES", "*")
+WIKI_TAG = os.environ.get("RSS_WIKI_TAG", "")
+# Identifies whoever runs this, whichever profiles' edits are being read
+# [Ref] https://foundation.wikimedia.org/wiki/Policy:Wikimedia_Foundation_User-Agent_Policy
+WIKI_UA = "AvelludoRSS/0.0 (https://en.wikipedia.org/wiki/User:Avelludo; selfrss@avl.la) python-requests"
+WIKI_HOSTS = ("en.wikipedia.org", "commons.wikimedia.org", "pt.wikipedia.org")
+
+
+def wiki_query(cutoff):
+	# Only edits between the cutoff and the start of this run are listed
+	return {
+		"ucstart": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(STARTED_AT)),
+		"ucend": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(cutoff)),
+		"ucnamespace": WIKI_NAMESPACES,
+		**({ "uctag": WIKI_TAG } if WIKI_TAG else {}),
+	}
+
+
+WIKIPEDIA_FEEDS = [
+	{
+		"url": f"https://{host}/w/api.php?{WIKI_PARAMS}",
+		"parse": parse_wikipedia,
+		"headers": { "User-Agent": WIKI_UA },
+		"as_json": True,
+		"continued": True,
+		"query": wiki_query,
+	}
+	for host in WIKI_HOSTS
+]
+
+
+MAL_PROGRESS = re.compile(r"(?P<status>[^\-]*) - (?P<watched>[0-9]+) of (?P<total>[0-9]+) episodes")
+
 
+def parse_mal(stream, url, cutoff, ordered):
 	output = []
-	for item in soup.find_all("item"):
+	for item in iter_xml(stream, "item", ("title", "link", "description", "pubDate")):
 		# <item>
 		# 	<title>FLCL</title>
 		# 	<link>https://myanimelist.net/anime/227/FLCL</link>
@@ -204,10 +1478,10 @@ def mal():
 		# 	</description>
 		# 	<pubDate>Tue, 29 Jul 2025 23:15:47 -0300</pubDate>
 		# </item>
-		anime_title = item.find("title").get_text()
-		anime_url = item.find("link").get_text()
-		description = item.find("description").get_text()
-		matches = re.search(r"(?P<status>[^\-]*) - (?P<watched>[0-9]+) of (?P<total>[0-9]+) episodes", description)
+		anime_title = item["title"]
+		anime_url = item["link"]
+		description = item["description"]
+		matches = MAL_PROGRESS.search(description)
 		watch_status = None
 		episodes_watched = None
 		episodes_total = None
@@ -215,47 +1489,112 @@ def mal():
 			watch_status = matches.group("status") or ""
 			episodes_watched = matches.group("watched")
 			episodes_total = matches.group("total")
-		pubDate = item.find("pubDate").get_text()
-		dt = datetime.datetime.strptime(pubDate, "%a, %d %b %Y %H:%M:%S %z")
+		pubDate = item["pubDate"]
+		timestamp = timestamps.parse_rfc822(pubDate)
 		# If this event is older than a month, ignore it
-		if dt < (datetime.datetime.now(tz=datetime.timezone.utc) - datetime.timedelta(days=30)):
+		if timestamp < cutoff:
+			count(url, "old")
+			# ...along with everything after it, if the feed is newest-first
+			if ordered:
+				break
 			continue
-		update_datetime = std_datetime(dt)
-		output.append({
-			"url": anime_url,
-			"datetime": update_datetime,
-			"title": anime_title,
-			"type": "mal",
-			"details": {
-				"event": "watch",
-				"status": watch_status,
-				"episodes_watched": episodes_watched,
-				"episodes_total": episodes_total
-			}
-		})
-	print(f"Finished reading XML; got {len(output)} entries. Limiting to latest 10")
-	output.sort(reverse=True, key=lambda obj: datetime.datetime.fromisoformat(obj["datetime"]))
+		output.append(Event(
+			url=anime_url,
+			timestamp=timestamp,
+			title=anime_title,
+			type="mal",
+			details=MalUpdate(
+				event="watch",
+				status=watch_status,
+				episodes_watched=episodes_watched,
+				episodes_total=episodes_total
+			)
+		))
 	return output
 
 
-def github():
-	# https://docs.github.com/en/rest/activity/events?apiVersion=2022-11-28#list-public-events-for-a-user
-	GH_ENDPOINT = "https://api.github.com/users/MatheusAvellar/events/public"
-	print(f"Sending GET to '{GH_ENDPOINT}'")
-	res = requests.get(
-		url=GH_ENDPOINT,
-		headers={
-			"Accept": "application/vnd.github+json",
-			"X-GitHub-Api-Version": "2022-11-28"
-		}
-	)
-	print(f"Response status: HTTP {res.status_code}")
-	if res.status_code >= 400:
-		return
-	res.encoding = "utf-8"
-	print(f"Got response of size '{len(res.text)}'")
+MAL_FEEDS = [
+	{
+		"url": "https://myanimelist.net/rss.php?type=rwe&u={user}",
+		"parse": parse_mal,
+	},
+]
+
+
+GH_HEADERS = {
+	"Accept": "application/vnd.github+json",
+	"X-GitHub-Api-Version": "2022-11-28"
+}
+# Largest page size the API allows
+# [Ref] https://docs.github.com/en/rest/using-the-rest-api/using-pagination-in-the-rest-api
+GH_PAGE_SIZE = 100
+
+
+# Each of these takes an event's type and payload, and returns its description
+# and URL (None for the repository's), or None to leave the event out
+def describe_pull_request(event_type, payload):
+	action = payload["action"].capitalize()
+	if action.lower().endswith("labeled"):
+		return None
+	pr = payload["pull_request"]
+	from_branch = pr["head"]["ref"]
+	to_branch = pr["base"]["ref"]
+	return (f"{action} pull request ('{from_branch}' → '{to_branch}')", pr["url"])
+
+
+def describe_ref(event_type, payload):
+	created_type = payload["ref_type"]
+	created_name = payload["ref"]
+	name = f"'{created_name}'" if created_name else ""
+	event_verb = "Created" if event_type == "CreateEvent" else "Deleted"
+	return (f"{event_verb} {created_type} {name}".strip(), None)
+
+
+def describe_fork(event_type, payload):
+	forked_to = payload["forkee"]["full_name"]
+	return (f"Forked to '{forked_to}'", payload["forkee"]["url"])
+
+
+def describe_star(event_type, payload):
+	if payload["action"] == "started":
+		return ("Starred repository", None)
+	return ("Unstarred repository", None)
+
+
+def describe_issue(event_type, payload):
+	action = payload["action"].capitalize()
+	return (f"{action} issue", payload["issue"]["url"])
+
+
+def describe_release(event_type, payload):
+	action = payload["action"].capitalize()
+	tag = payload["release"]["name"]
+	return (f"{action} to '{tag}'", payload["release"]["url"])
+
+
+# Event type -> how to describe it; None leaves every event of that type out.
+# Other types are left out too, with a warning
+GITHUB_EVENTS = {
+	"PushEvent": None,
+	"PullRequestEvent": describe_pull_request,
+	"CreateEvent": describe_ref,
+	"DeleteEvent": describe_ref,
+	"ForkEvent": describe_fork,
+	"WatchEvent": describe_star,
+	"IssuesEvent": describe_issue,
+	"PublicEvent": lambda event_type, payload: ("Made public", None),
+	"ReleaseEvent": describe_release,
+}
+# Types missing from `GITHUB_EVENTS` that were already warned about this run
+unknown_github_events = set()
+
+
+def describe_github_event(event_type, payload):
+	describe = GITHUB_EVENTS.get(event_type)
+	return describe(event_type, payload) if describe else None
+
 
-	res_obj = res.json()
+def parse_github(res_obj, url, cutoff, ordered):
 	output = []
 	for evt in res_obj:
 		# {
@@ -285,104 +1624,61 @@ def github():
 		# 		"avatar_url": "..."
 		# 	}
 		# },
-		event_type = evt["type"]
-		if event_type == "PushEvent":
-			continue
-
 		created = evt["created_at"]
-		dt = datetime.datetime.strptime(created, "%Y-%m-%dT%H:%M:%S%z")
+		timestamp = timestamps.parse_iso8601(created)
 		# If this event is older than a month, ignore it
-		month_ago = (
-			datetime.datetime.now(tz=datetime.timezone.utc) - datetime.timedelta(days=30)
-		)
-		if dt < month_ago:
+		if timestamp < cutoff:
+			count(url, "old")
+			# ...along with everything after it, if the feed is newest-first
+			if ordered:
+				break
 			continue
 
-		event_datetime = std_datetime(dt)
+		event_type = evt["type"]
 		repository = evt["repo"]["name"]
-		event_description = ""
-		event_url = f"https://github.com/{repository}"
-
-		payload = evt["payload"]
-		# Pull request
-		if event_type == "PullRequestEvent":
-			action = payload["action"].capitalize()
-			if action.lower().endswith("labeled"): continue
-			pr = payload["pull_request"]
-			from_branch = pr["head"]["ref"]
-			to_branch = pr["base"]["ref"]
-			event_description = f"{action} pull request ('{from_branch}' → '{to_branch}')"
-			event_url = pr["url"]
-		# Create, Delete
-		elif event_type == "CreateEvent" or event_type == "DeleteEvent":
-			created_type = payload["ref_type"]
-			created_name = payload["ref"]
-			name = f"'{created_name}'" if created_name else ""
-			event_verb = "Created" if event_type == "CreateEvent" else "Deleted"
-			event_description = f"{event_verb} {created_type} {name}".strip()
-		# Fork
-		elif event_type == "ForkEvent":
-			forked_to = payload["forkee"]["full_name"]
-			event_description = f"Forked to '{forked_to}'"
-			event_url = payload["forkee"]["url"]
-		# Star
-		elif event_type == "WatchEvent":
-			if payload["action"] == "started":
-				event_description = "Starred repository"
-			else:
-				event_description = "Unstarred repository"
-		# Issue
-		elif event_type == "IssuesEvent":
-			action = payload["action"].capitalize()
-			event_description = f"{action} issue"
-			event_url = payload["issue"]["url"]
-		# Make repository public
-		elif event_type == "PublicEvent":
-			event_description = f"Made public"
-		# Release version
-		elif event_type == "ReleaseEvent":
-			action = payload["action"].capitalize()
-			tag = payload["release"]["name"]
-			event_description = f"{action} to '{tag}'"
-			event_url = payload["release"]["url"]
-		else:
-			print(f"Unrecognized event '{event_type}', please add it")
+		if event_type not in GITHUB_EVENTS:
+			if event_type not in unknown_github_events:
+				unknown_github_events.add(event_type)
+				print(f"Unrecognized event '{event_type}', please add it to `GITHUB_EVENTS`")
+			count(url, "skipped")
+			continue
+		described = describe_github_event(event_type, evt["payload"])
+		if described is None:
+			count(url, "skipped")
 			continue
+		event_description, event_url = described
+		event_url = event_url or f"https://github.com/{repository}"
 
-		output.append({
-			"url": event_url,
-			"datetime": event_datetime,
-			"title": repository,
-			"type": "github",
-			"details": {
-				"kind": "github",
-				"event": event_type,
-				"description": event_description,
-			}
-		})
-	print(f"Finished reading JSON; got {len(output)} entries. Limiting to latest 10")
-	output.sort(reverse=True, key=lambda obj: datetime.datetime.fromisoformat(obj["datetime"]))
+		output.append(Event(
+			url=event_url,
+			timestamp=timestamp,
+			title=repository,
+			type="github",
+			details=GithubEvent(
+				kind="github",
+				event=event_type,
+				description=event_description,
+			)
+		))
 	return output
 
 
-def gist():
-	# https://docs.github.com/en/rest/gists/gists?apiVersion=2022-11-28#list-public-gists
-	GH_ENDPOINT = "https://api.github.com/users/MatheusAvellar/gists"
-	print(f"Sending GET to '{GH_ENDPOINT}'")
-	res = requests.get(
-		url=GH_ENDPOINT,
-		headers={
-			"Accept": "application/vnd.github+json",
-			"X-GitHub-Api-Version": "2022-11-28"
-		}
-	)
-	print(f"Response status: HTTP {res.status_code}")
-	if res.status_code >= 400:
-		return
-	res.encoding = "utf-8"
-	print(f"Got response of size '{len(res.text)}'")
+# https://docs.github.com/en/rest/activity/events?apiVersion=2022-11-28#list-public-events-for-a-user
+# GitHub answers conditional requests with HTTP 304, which don't count against
+# the rate limit. Events are newest-first, and only the last 300 are available,
+# so this is 3 pages at most
+GITHUB_FEEDS = [
+	{
+		"url": f"https://api.github.com/users/{{user}}/events/public?per_page={GH_PAGE_SIZE}",
+		"parse": parse_github,
+		"headers": GH_HEADERS,
+		"as_json": True,
+		"paginate": True,
+	},
+]
+
 
-	res_obj = res.json()
+def parse_gist(res_obj, url, cutoff, ordered):
 	output = []
 	for evt in res_obj:
 		# {
@@ -407,141 +1703,166 @@ def gist():
 		# 	"truncated": false
 		# },
 		created = evt["created_at"]
-		dt = datetime.datetime.strptime(created, "%Y-%m-%dT%H:%M:%S%z")
+		timestamp = timestamps.parse_iso8601(created)
 		# If this event is older than a month, ignore it
-		month_ago = (
-			datetime.datetime.now(tz=datetime.timezone.utc) - datetime.timedelta(days=30)
-		)
-		if dt < month_ago:
+		if timestamp < cutoff:
+			count(url, "old")
+			# ...along with everything after it, if the feed is newest-first
+			if ordered:
+				break
 			continue
-		event_datetime = std_datetime(dt)
 
 		title = evt["description"]
 		event_description = ""
 		event_url = evt["html_url"]
 
-		output.append({
-			"url": event_url,
-			"datetime": event_datetime,
-			"title": title,
-			"type": "github",
-			"details": {
-				"kind": "gist",
-				"event": "GistEvent"
-			}
-		})
-	print(f"Finished reading JSON; got {len(output)} entries. Limiting to latest 10")
-	output.sort(reverse=True, key=lambda obj: datetime.datetime.fromisoformat(obj["datetime"]))
+		output.append(Event(
+			url=event_url,
+			timestamp=timestamp,
+			title=title,
+			type="github",
+			details=GistEvent(
+				kind="gist",
+				event="GistEvent"
+			)
+		))
 	return output
 
 
+# https://docs.github.com/en/rest/gists/gists?apiVersion=2022-11-28#list-public-gists
+# Not sorted by creation date, so every page is read
+GIST_FEEDS = [
+	{
+		"url": f"https://api.github.com/users/{{user}}/gists?per_page={GH_PAGE_SIZE}",
+		"parse": parse_gist,
+		"headers": GH_HEADERS,
+		"as_json": True,
+		"paginate": True,
+	},
+]
+
+
 # Flickr:
 # https://www.flickr.com/services/feeds/photos_public.gne?id=202939403@N02
 
 
-def goodreads():
-	custom_ua = "Mozilla/5.0 (Windows NT 10.0; selfrss@avl.la) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36"
-	#####################
-	## General updates ##
-	#####################
-	soup = get_xml(
-		"https://www.goodreads.com/review/list_rss/193877929",
-		headers={ "User-Agent": custom_ua }
-	)
+GOODREADS_UA = "Mozilla/5.0 (Windows NT 10.0; selfrss@avl.la) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/139.0.0.0 Safari/537.36"
+
 
-	books = dict()
+#####################
+## General updates ##
+#####################
+def parse_goodreads_reviews(stream, url, cutoff, ordered):
 	output = []
-	if soup is None:
-		print(f"Failed reading first XML")
-	else:
-		for entry in soup.find_all("item"):
-			# <item>
-			# 	<guid><![CDATA[https://www.goodreads.com/review/show/7918416850?utm_medium=api&utm_source=rss]]></guid>
-			# 	<pubDate><![CDATA[Mon, 15 Sep 2025 18:12:35 -0700]]></pubDate>
-			# 	<title>Arrival</title>
-			# 	<link><![CDATA[https://www.goodreads.com/review/show/7918416850?utm_medium=api&utm_source=rss]]></link>
-			# 	<book_id>31625351</book_id>
-			# 	<book_image_url><![CDATA[https://i.gr-assets.com/images/S/compressed.photo.goodreads.com/books/1478010711l/31625351._SY75_.jpg]]></book_image_url>
-			# 	<book_small_image_url><![CDATA[https://i.gr-assets.com/images/S/compressed.photo.goodreads.com/books/1478010711l/31625351._SY75_.jpg]]></book_small_image_url>
-			# 	<book_medium_image_url><![CDATA[https://i.gr-assets.com/images/S/compressed.photo.goodreads.com/books/1478010711l/31625351._SX98_.jpg]]></book_medium_image_url>
-			# 	<book_large_image_url><![CDATA[https://i.gr-assets.com/images/S/compressed.photo.goodreads.com/books/1478010711l/31625351._SY475_.jpg]]></book_large_image_url>
-			# 	<book_description><![CDATA[From a soaring Babylonian tower that connects a flat Earth with the heavens above, to a world where angelic visitations are a wondrous and terrifying part of everyday life; from a neural modification that eliminates the appeal of physical beauty, to an alien language that challenges our very perception of time and reality... Chiang's rigorously imagined stories invite us to question our understanding of the universe and our place in it.]]></book_description>
-			# 	<book id="31625351">
-			# 		<num_pages>304</num_pages>
-			# 	</book>
-			# 	<author_name>Ted Chiang</author_name>
-			# 	<isbn>0525433678</isbn>
-			# 	<user_name>Matheus</user_name>
-			# 	<user_rating>0</user_rating>
-			# 	<user_read_at></user_read_at>
-			# 	<user_date_added><![CDATA[Mon, 15 Sep 2025 18:12:35 -0700]]></user_date_added>
-			# 	<user_date_created><![CDATA[Mon, 15 Sep 2025 17:43:39 -0700]]></user_date_created>
-			# 	<user_shelves>to-read</user_shelves>
-			# 	<user_review></user_review>
-			# 	<average_rating>4.10</average_rating>
-			# 	<book_published>2002</book_published>
-			# 	<description>
-			# 		<![CDATA[
-			# 			<a href="https://www.goodreads.com/book/show/31625351-arrival?utm_medium=api&amp;utm_source=rss"><img alt="Arrival" src="https://i.gr-assets.com/images/S/compressed.photo.goodreads.com/books/1478010711l/31625351._SY75_.jpg" /></a><br/>
-			# 			author: Ted Chiang<br/>
-			# 			name: Matheus<br/>
-			# 			average rating: 4.10<br/>
-			# 			book published: 2002<br/>
-			# 			rating: 0<br/>
-			# 			read at: <br/>
-			# 			date added: 2025/09/15<br/>
-			# 			shelves: to-read<br/>
-			# 			review: <br/><br/>
-			# 		]]>
-			# 	</description>
-			# </item>
-
-			review_url = get_text(entry.find("link"))
-			pubDate = get_text(entry.find("pubDate"))
-			dt = datetime.datetime.strptime(pubDate, "%a, %d %b %Y %H:%M:%S %z")
-			# If this event is older than a month, ignore it
-			if dt < (datetime.datetime.now(tz=datetime.timezone.utc) - datetime.timedelta(days=30)):
-				continue
-			review_datetime = std_datetime(dt)
-			book_title = get_text(entry.find("title"))
-			book_year = get_text(entry.find("book_published"))
-			books[book_title] = book_year
-			rating = get_text(entry.find("user_rating"))
-			isbn = get_text(entry.find("isbn"))
-			description = get_text(entry.find("description"))
-			author_name = get_text(entry.find("author_name"))
-			shelves = get_text(entry.find("user_shelves"))
-			# cover_url = get_text(entry.find("book_small_image_url"))
-			output.append({
-				"url": review_url,
-				"datetime": review_datetime,
-				"title": f"{book_title.split(':')[0]} ({book_year})" if book_year else book_title,
-				"type": "goodreads",
-				"details": {
-					"event": "added",
-					"raw_title": book_title,
-					"raw_year": book_year,
-					"author": author_name,
-					"rating": rating if rating != "0" else "",
-					"shelves": shelves,
-					"isbn": isbn,
-					# "cover_url": cover_url
-				}
-			})
+	fields = (
+		"link", "pubDate", "title", "book_published", "user_rating",
+		"isbn", "book_id", "author_name", "user_shelves", "book_small_image_url"
+	)
+	for entry in iter_xml(stream, "item", fields):
+		# <item>
+		# 	<guid><![CDATA[https://www.goodreads.com/review/show/7918416850?utm_medium=api&utm_source=rss]]></guid>
+		# 	<pubDate><![CDATA[Mon, 15 Sep 2025 18:12:35 -0700]]></pubDate>
+		# 	<title>Arrival</title>
+		# 	<link><![CDATA[https://www.goodreads.com/review/show/7918416850?utm_medium=api&utm_source=rss]]></link>
+		# 	<book_id>31625351</book_id>
+		# 	<book_image_url><![CDATA[https://i.gr-assets.com/images/S/compressed.photo.goodreads.com/books/1478010711l/31625351._SY75_.jpg]]></book_image_url>
+		# 	<book_small_image_url><![CDATA[https://i.gr-assets.com/images/S/compressed.photo.goodreads.com/books/1478010711l/31625351._SY75_.jpg]]></book_small_image_url>
+		# 	<book_medium_image_url><![CDATA[https://i.gr-assets.com/images/S/compressed.photo.goodreads.com/books/1478010711l/31625351._SX98_.jpg]]></book_medium_image_url>
+		# 	<book_large_image_url><![CDATA[https://i.gr-assets.com/images/S/compressed.photo.goodreads.com/books/1478010711l/31625351._SY475_.jpg]]></book_large_image_url>
+		# 	<book_description><![CDATA[From a soaring Babylonian tower that connects a flat Earth with the heavens above, to a world where angelic visitations are a wondrous and terrifying part of everyday life; from a neural modification that eliminates the appeal of physical beauty, to an alien language that challenges our very perception of time and reality... Chiang's rigorously imagined stories invite us to question our understanding of the universe and our place in it.]]></book_description>
+		# 	<book id="31625351">
+		# 		<num_pages>304</num_pages>
+		# 	</book>
+		# 	<author_name>Ted Chiang</author_name>
+		# 	<isbn>0525433678</isbn>
+		# 	<user_name>Matheus</user_name>
+		# 	<user_rating>0</user_rating>
+		# 	<user_read_at></user_read_at>
+		# 	<user_date_added><![CDATA[Mon, 15 Sep 2025 18:12:35 -0700]]></user_date_added>
+		# 	<user_date_created><![CDATA[Mon, 15 Sep 2025 17:43:39 -0700]]></user_date_created>
+		# 	<user_shelves>to-read</user_shelves>
+		# 	<user_review></user_review>
+		# 	<average_rating>4.10</average_rating>
+		# 	<book_published>2002</book_published>
+		# 	<description>
+		# 		<![CDATA[
+		# 			<a href="https://www.goodreads.com/book/show/31625351-arrival?utm_medium=api&amp;utm_source=rss"><img alt="Arrival" src="https://i.gr-assets.com/images/S/compressed.photo.goodreads.com/books/1478010711l/31625351._SY75_.jpg" /></a><br/>
+		# 			author: Ted Chiang<br/>
+		# 			name: Matheus<br/>
+		# 			average rating: 4.10<br/>
+		# 			book published: 2002<br/>
+		# 			rating: 0<br/>
+		# 			read at: <br/>
+		# 			date added: 2025/09/15<br/>
+		# 			shelves: to-read<br/>
+		# 			review: <br/><br/>
+		# 		]]>
+		# 	</description>
+		# </item>
 
+		review_url = entry["link"]
+		pubDate = entry["pubDate"]
+		timestamp = timestamps.parse_rfc822(pubDate)
+		# If this event is older than a month, ignore it
+		if timestamp < cutoff:
+			count(url, "old")
+			# ...along with everything after it, if the feed is newest-first
+			if ordered:
+				break
+			continue
+		book_title = entry["title"]
+		book_year = entry["book_published"]
+		rating = entry["user_rating"]
+		isbn = entry["isbn"]
+		author_name = entry["author_name"]
+		shelves = entry["user_shelves"]
+		details = GoodreadsAdded(
+			event="added",
+			raw_title=book_title,
+			raw_year=book_year,
+			author=author_name,
+			rating=rating if rating != "0" else "",
+			shelves=shelves,
+			isbn=isbn,
+			book_id=entry["book_id"],
+		)
+		# Not every edition has an ISBN, e.g. ebooks, in which case it's
+		# known by `book_id`
+		key = artwork_key(details)
+		if key is not None and not knows_artwork(key):
+			remember_artwork(key, entry["book_small_image_url"])
+		output.append(Event(
+			url=review_url,
+			timestamp=timestamp,
+			title=f"{book_title.split(':')[0]} ({book_year})" if book_year else book_title,
+			type="goodreads",
+			details=details,
+		))
+	return output
 
-	#####################
-	## Page updates    ##
-	#####################
-	soup = get_xml(
-		"https://www.goodreads.com/user_status/list/193877929-matheus-avellar?format=rss",
-		headers={ "User-Agent": custom_ua }
-	)
-	if soup is None:
-		print(f"Failed reading second XML; got {len(output)} entries. Limiting to latest 10")
-		return output.sort(reverse=True, key=lambda obj: datetime.datetime.fromisoformat(obj["datetime"]))
 
-	for entry in soup.find_all("item"):
+#####################
+## Page updates    ##
+#####################
+# "<name> is on page 70 of 432 of <title>" or "<name> is finished with <title>"
+GOODREADS_STATUS = re.compile(
+	r"^.+? is (?:on page (?P<read>[0-9]+) of (?P<total>[0-9]+) of|finished with) (?P<title>.+)$"
+)
+
+
+def classify_goodreads_status(title):
+	# (event, pages read, total pages, book title), or None if it's neither
+	matches = GOODREADS_STATUS.match(title)
+	if matches is None:
+		return None
+	if matches.group("read") is None:
+		return ("finished", -1, -1, matches.group("title"))
+	return ("pages-read", matches.group("read"), matches.group("total"), matches.group("title"))
+
+
+def parse_goodreads_statuses(stream, url, cutoff, ordered):
+	output = []
+	for entry in iter_xml(stream, "item", ("link", "pubDate", "title")):
 		# <item>
 		# 	<title>Matheus Avellar is on page 70 of 432 of Tales of Old Japan</title>
 		# 	<description></description>
@@ -549,88 +1870,748 @@ def goodreads():
 		# 	<guid>https://www.goodreads.com/user_status/show/1140465388</guid>
 		# 	<link>https://www.goodreads.com/user_status/show/1140465388</link>
 		# </item>
-		review_url = get_text(entry.find("link"))
-		pubDate = get_text(entry.find("pubDate"))
-		dt = datetime.datetime.strptime(pubDate, "%a, %d %b %Y %H:%M:%S %z")
+		review_url = entry["link"]
+		pubDate = entry["pubDate"]
+		timestamp = timestamps.parse_rfc822(pubDate)
 		# If this event is older than a month, ignore it
-		if dt < (datetime.datetime.now(tz=datetime.timezone.utc) - datetime.timedelta(days=30)):
+		if timestamp < cutoff:
+			count(url, "old")
+			# ...along with everything after it, if the feed is newest-first
+			if ordered:
+				break
 			continue
-		review_datetime = std_datetime(dt)
-
-		title = get_text(entry.find("title"))
-		pages_read_matches = re.search(r"^.+ is on page (?P<read>[0-9]+) of (?P<total>[0-9]+) of (?P<title>.+)$", title)
-		finished_matches = re.search(r"^.+ is finished with (?P<title>.+)$", title)
-		if pages_read_matches is not None:
-			pages_read = pages_read_matches.group("read")
-			pages_total = pages_read_matches.group("total")
-			book_title = pages_read_matches.group("title")
-			event_type = "pages-read"
-		elif finished_matches is not None:
-			pages_read = -1
-			pages_total = -1
-			book_title = finished_matches.group("title")
-			event_type = "finished"
-		else:
+
+		title = entry["title"]
+		status = classify_goodreads_status(title)
+		if status is None:
 			print(f"Ignoring unrecognized Goodreads event: '{title}'")
+			count(url, "skipped")
 			continue
+		event_type, pages_read, pages_total, book_title = status
+		# The year is filled in by `normalize_goodreads()`, from the general updates
+		output.append(Event(
+			url=review_url,
+			timestamp=timestamp,
+			title=book_title,
+			type="goodreads",
+			details=GoodreadsProgress(
+				event=event_type,
+				raw_title=book_title,
+				raw_year=None,
+				pages_read=pages_read,
+				pages_total=pages_total
+			)
+		))
+	return output
+
+
+GOODREADS_FEEDS = [
+	{
+		"url": "https://www.goodreads.com/review/list_rss/{user_id}",
+		"parse": parse_goodreads_reviews,
+		"headers": { "User-Agent": GOODREADS_UA },
+	},
+	{
+		"url": "https://www.goodreads.com/user_status/list/{user}?format=rss",
+		"parse": parse_goodreads_statuses,
+		"headers": { "User-Agent": GOODREADS_UA },
+	},
+]
+
+
+def normalize_goodreads(results, feed_urls):
+	reviews, statuses = results
+	if statuses is None:
+		return results
+
+	# Page updates only mention the book's title, so its year is taken from
+	# whichever general update added that book, in this run or a previous one
+	books = {
+		entry.details.raw_title: entry.details.raw_year
+		for entry in [ *load_events(feed_urls[:1]), *(reviews or []) ]
+		if isinstance(entry.details, GoodreadsAdded)
+	}
+	output = []
+	for entry in statuses:
+		book_title = entry.details.raw_title
 		book_year = books[book_title] if book_title in books else None
+		output.append(entry._replace(
+			title=f"{book_title.split(':')[0]} ({book_year})" if book_year else book_title,
+			details=entry.details._replace(raw_year=book_year)
+		))
+	return [ reviews, output ]
+
+
+# Profile -> { account kind -> username }; every profile gets its own output,
+# from the sources it has an account for. Others can be given with `--profiles`
+DEFAULT_PROFILES = {
+	"eu": {
+		"letterboxd": "matheusavellar",
+		"wikimedia": "Avelludo",
+		"github": "MatheusAvellar",
+		"mal": "Beta-Tester",
+		"goodreads": "193877929-matheus-avellar",
+	},
+}
+SOURCES = {
+	# Each film (or list) links to its own page
+	"letterboxd": Source(account="letterboxd", feeds=LETTERBOXD_FEEDS, ttl=60 * 60, identity=same_url),
+	# Every edit links to its own diff, so the edits of a page are shown once a
+	# day, for each wiki
+	"wikipedia": Source(
+		account="wikimedia",
+		feeds=WIKIPEDIA_FEEDS,
+		ttl=30 * 60,
+		identity=same_page_and_day
+	),
+	# Pull requests, issues and releases link to their own pages, and
+	# everything else to the repository
+	"github": Source(account="github", feeds=GITHUB_FEEDS, ttl=15 * 60, identity=same_action),
+	# Gists are listed by when they were last updated, not created
+	"gist": Source(account="github", feeds=GIST_FEEDS, ordered=False, ttl=60 * 60, identity=same_url),
+	"mal": Source(account="mal", feeds=MAL_FEEDS, ttl=2 * 60 * 60, identity=same_title_and_day),
+	# Every status update links to its own page, so reading progress on the
+	# same book is kept
+	"goodreads": Source(
+		account="goodreads",
+		feeds=GOODREADS_FEEDS,
+		normalize=normalize_goodreads,
+		ttl=2 * 60 * 60,
+		identity=same_url
+	),
+}
+MAX_EVENTS = int(os.environ.get("RSS_MAX_EVENTS", "50"))
+
+
+def load_profiles(path):
+	with open(path, "r", encoding="utf-8") as f:
+		profiles = json.load(f)
+	for profile, accounts in profiles.items():
+		# Used as a directory name under `OUTPUT_DIR`
+		if not re.fullmatch(r"[\w-]+", profile) or not isinstance(accounts, dict):
+			raise ValueError(f"Invalid profile '{profile}' in '{path}'")
+	return profiles
+
+
+def plan_feeds(profiles, sources=None):
+	# Profile -> source -> that profile's feeds of it, as `fetch_entries()`
+	# arguments, plus the account they're of as "scope" (events are only ever
+	# duplicates of others from the same account). Sources a profile has no
+	# account for are left out
+	plan = {}
+	for profile, accounts in profiles.items():
+		plan[profile] = {}
+		for name in (sources or SOURCES):
+			user = accounts.get(SOURCES[name].account)
+			if not user:
+				continue
+			user = urllib.parse.quote(user)
+			plan[profile][name] = [
+				{
+					**feed,
+					"url": feed["url"].format(user=user, user_id=user.partition("-")[0]),
+					"source": name,
+					"scope": f"{SOURCES[name].account}:{user}",
+				}
+				for feed in SOURCES[name].feeds
+			]
+	return plan
+
+
+def collect(plan, adaptive=False):
+	# Every feed of every profile is fetched at once, and a feed that several
+	# profiles share (by URL) only once
+	jobs = {}
+	for feeds_by_source in plan.values():
+		for feeds in feeds_by_source.values():
+			for feed in feeds:
+				jobs.setdefault(feed["url"], {
+					**{ key: value for key, value in feed.items() if key != "scope" },
+					"adaptive": adaptive,
+				})
+	return normalize_all(plan, dict(zip(jobs, fetch_all_entries(list(jobs.values())))))
 
-		output.append({
-			"url": review_url,
-			"datetime": review_datetime,
-			"title": f"{book_title.split(':')[0]} ({book_year})" if book_year else book_title,
-			"type": "goodreads",
-			"details": {
-				"event": event_type,
-				"raw_title": book_title,
-				"raw_year": book_year,
-				"pages_read": pages_read,
-				"pages_total": pages_total
+
+def normalize_all(plan, fetched):
+	# Each profile's sources normalize what their feeds got (feed URL ->
+	# entries, or None if it failed); returns feed URL -> (source, entries or None)
+	results = {}
+	for profile, feeds_by_source in plan.items():
+		for name, feeds in feeds_by_source.items():
+			feed_urls = [ feed["url"] for feed in feeds ]
+			try:
+				normalized = SOURCES[name].normalize([ fetched[url] for url in feed_urls ], feed_urls)
+			except Exception:
+				print(f"Collecting '{name}' for '{profile}' failed:")
+				traceback.print_exc(file=sys.stdout)
+				count_source(profile, name, "failed")
+				continue
+			for url, entries in zip(feed_urls, normalized):
+				results[url] = (name, entries)
+				count_source(profile, name, "entries", len(entries or []))
+	return results
+
+
+def replay_feed(feed, pages):
+	# The entries of a feed's archived pages, as (sha256, cutoff), parsed as
+	# `fetch_entries()` did. Archived bodies end where the parser stopped
+	# reading, so they're read with the same cutoff; None if they can't be read
+	parse, url, ordered = feed["parse"], feed["url"], SOURCES[feed["source"]].ordered
+	entries = []
+	try:
+		for digest, cutoff in pages:
+			with open_archived(digest) as body:
+				if feed.get("as_json"):
+					entries.extend(parse(json_items(json.load(body), feed.get("continued")), url, cutoff, ordered))
+				else:
+					entries.extend(parse(body, url, cutoff, ordered))
+	except Exception:
+		print(f"Replaying '{url}' failed:")
+		traceback.print_exc(file=sys.stdout)
+		return None
+	return entries
+
+
+def replay(plan, since=0, until=None, rebuild=False):
+	# Parses the archived bodies of the planned feeds again, one run at a time
+	# and oldest first, and merges them into the store as that run did;
+	# nothing is fetched. With `rebuild`, what's stored of these feeds is
+	# dropped first, so that the store ends up as the current parsers read the
+	# archive. Returns how many runs were replayed
+	jobs = {
+		feed["url"]: feed
+		for feeds_by_source in plan.values()
+		for feeds in feeds_by_source.values()
+		for feed in feeds
+	}
+	placeholders = ", ".join("?" * len(jobs))
+	if rebuild:
+		with store:
+			store.execute(f"DELETE FROM events WHERE feed IN ({placeholders})", tuple(jobs))
+			store.execute(f"DELETE FROM seen WHERE feed IN ({placeholders})", tuple(jobs))
+		for key in [ key for key, row in seen.items() if row[0] in jobs ]:
+			del seen[key]
+	rows = store.execute(
+		f"""
+		SELECT run, feed, sha256, cutoff FROM archive
+		WHERE feed IN ({placeholders}) AND run >= ? AND run < ?
+		ORDER BY run, feed, page
+		""",
+		(*jobs, since, until or sys.maxsize)
+	).fetchall()
+
+	runs = 0
+	for run, run_rows in itertools.groupby(rows, key=lambda row: row[0]):
+		pages = {}
+		for _, url, digest, cutoff in run_rows:
+			pages.setdefault(url, []).append((digest, cutoff))
+		# Feeds the run didn't read are as if they had failed
+		fetched = { url: replay_feed(jobs[url], pages[url]) if url in pages else None for url in jobs }
+		# Merged as of that run, not as of now, so that identities (see
+		# `save_seen()`) of events older than `SEEN_DAYS` are still told apart
+		merge(normalize_all(plan, fetched), plan, run)
+		runs += 1
+	return runs
+
+
+def merge(results, plan, run):
+	# Merges this run's events into the store, marking duplicates (see
+	# `sort_duplicates()`); the output is then built from the store, so a feed
+	# that failed this time still shows what it had
+	scopes = {
+		feed["url"]: feed["scope"]
+		for feeds_by_source in plan.values()
+		for feeds in feeds_by_source.values()
+		for feed in feeds
+	}
+	with store:
+		for url, (source, entries) in results.items():
+			shown, superseded = sort_duplicates(url, scopes[url], source, entries or [])
+			store_events(url, source, shown)
+			store_events(url, source, superseded, superseded=True)
+		save_feeds()
+		save_seen(run)
+		save_archive(run)
+
+
+def latest_events(profile, feeds_by_source, max_events=MAX_EVENTS):
+	# Each source is already a newest-first stream out of the store, so we only
+	# read its latest events (up to its `limit`), and then merge the streams by
+	# timestamp until we have `max_events`; nothing needs to be sorted
+	streams = [
+		zip(
+			itertools.repeat(source),
+			itertools.islice(
+				iter_events([ feed["url"] for feed in feeds ], since=CUTOFF, superseded=False),
+				SOURCES[source].limit
+			)
+		)
+		for source, feeds in feeds_by_source.items()
+	]
+	latest = list(itertools.islice(
+		heapq.merge(*streams, key=lambda pair: pair[1].timestamp, reverse=True),
+		max_events
+	))
+	for source, _ in latest:
+		count_source(profile, source, "shown")
+	return [ event for _, event in latest ]
+
+
+def history_events(feeds_by_source):
+	# Every stored event of these sources, newest first, as (source, event) pairs
+	streams = [
+		zip(itertools.repeat(source), iter_events([ feed["url"] for feed in feeds ]))
+		for source, feeds in feeds_by_source.items()
+	]
+	return heapq.merge(*streams, key=lambda pair: pair[1].timestamp, reverse=True)
+
+
+def dump_json(document):
+	return json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def write_file(path, data, quality=BROTLI_QUALITY):
+	# Along with precompressed `.gz` and `.br` siblings, for clients that would
+	# rather fetch those and decompress them themselves. Every file is written
+	# whole and then renamed, so a half-written one is never served
+	variants = { "": data, ".gz": gzip.compress(data, compresslevel=9, mtime=0) }
+	if brotli is not None:
+		variants[".br"] = brotli.compress(data, quality=quality)
+	for suffix, content in variants.items():
+		with open(f"{path}{suffix}.tmp", "wb") as f:
+			f.write(content)
+		os.replace(f"{path}{suffix}.tmp", f"{path}{suffix}")
+
+
+def output_changed(path, payload, updated_at):
+	# Whether `payload` differs from what was last written to `path`, and when
+	# it last changed, i.e. `updated_at` if it just did
+	key = os.path.relpath(path, OUTPUT_DIR)
+	digest = hashlib.sha256(payload).hexdigest()
+	last = output_hashes.get(key)
+	if last is not None and last["sha256"] == digest:
+		return False, last["updated_at"]
+	output_hashes[key] = { "sha256": digest, "updated_at": updated_at }
+	return True, updated_at
+
+
+def remove_output(path):
+	# A file or directory of output that's no longer written, along with the
+	# hashes of what was in it
+	if os.path.isdir(path):
+		shutil.rmtree(path)
+	else:
+		os.remove(path)
+	key = os.path.relpath(path, OUTPUT_DIR)
+	for name in [ name for name in output_hashes if name == key or name.startswith(key + os.sep) ]:
+		del output_hashes[name]
+
+
+def write_events(directory, name, updated_at, data, jsonl=False, quality=BROTLI_QUALITY):
+	# Writes `<name>.json` (and `<name>.jsonl`, one event per line, which can
+	# be read as it downloads) from events as `event_json()` gives them, and
+	# returns how `index.json` lists it. Files whose events haven't changed
+	# keep their `updated_at`, and are only written if they're missing
+	payload = dump_json(data)
+	path = os.path.join(directory, f"{name}.json")
+	changed, updated_at = output_changed(path, payload, updated_at)
+	# Same as `dump_json({ "updated_at": updated_at, "data": data })`
+	document = b'{"updated_at":' + dump_json(updated_at) + b',"data":' + payload + b"}"
+	if changed or not os.path.exists(path):
+		write_file(path, document, quality)
+	if jsonl:
+		if changed or not os.path.exists(f"{path}l"):
+			write_file(f"{path}l", b"".join(dump_json(event) + b"\n" for event in data), quality)
+	else:
+		# Left behind by an earlier run with `jsonl`
+		for suffix in ("", ".gz", ".br"):
+			with contextlib.suppress(FileNotFoundError):
+				os.remove(f"{path}l{suffix}")
+	return {
+		"path": f"{name}.json",
+		"updated_at": updated_at,
+		"events": len(data),
+		"bytes": len(document),
+		"newest": data[0]["datetime"] if data else None,
+		"oldest": data[-1]["datetime"] if data else None,
+	}
+
+
+def write_shards(directory, kind, updated_at, groups, jsonl=False):
+	# Writes each of `groups` (key -> events) as `<kind>/<key>.json` (see
+	# `write_events()`), removes any other file there, and returns how
+	# `index.json` lists them
+	os.makedirs(os.path.join(directory, kind), exist_ok=True)
+	listed = {
+		key: write_events(directory, f"{kind}/{key}", updated_at, data, jsonl, SHARD_BROTLI_QUALITY)
+		for key, data in groups.items()
+	}
+	for name in os.listdir(os.path.join(directory, kind)):
+		path = os.path.join(directory, kind, name)
+		if os.path.isdir(path) or name.partition(".")[0] not in groups:
+			remove_output(path)
+	return listed
+
+
+def write_output(profile, events, feeds_by_source, jsonl=False, shards=True):
+	# Writes, under `<OUTPUT_DIR>/<profile>/`:
+	#  - `rss.json`, the latest `events`
+	#  - with `shards`, every stored event of each month (in UTC) in
+	#    `months/<YYYY-MM>.json`, and of each source in each month in
+	#    `sources/<source>/<YYYY-MM>.json`, so clients can get older events
+	#    without downloading all of them, and a new event only rewrites its
+	#    own month
+	#  - `index.json`, listing all of the above
+	#  - `checked.json`, with when this ran and when anything last changed
+	# Each in the same format as `rss.json`, and also as JSON Lines with
+	# `jsonl`. Returns the index, and whether anything changed since the last
+	# run, i.e. whether the output needs deploying again
+	directory = os.path.join(OUTPUT_DIR, profile)
+	right_now = datetime.datetime.now(tz=datetime.timezone.utc)
+	checked_at = std_datetime(right_now).replace("+00:00", "Z")
+	index = {
+		"formats": [ "json", "jsonl" ] if jsonl else [ "json" ],
+		"encodings": [ "gz", "br" ] if brotli is not None else [ "gz" ],
+	}
+	os.makedirs(directory, exist_ok=True)
+	index["latest"] = write_events(
+		directory, "rss", checked_at, [ event_json(event) for event in events ], jsonl
+	)
+
+	if shards:
+		# Source -> month -> its events, and month -> every source's events
+		by_source = { source: {} for source in feeds_by_source }
+		by_month = {}
+		for source, event in history_events(feeds_by_source):
+			data = event_json(event, shown=False)
+			month = data["datetime"][:7]
+			by_source[source].setdefault(month, []).append(data)
+			by_month.setdefault(month, []).append(data)
+		index["sources"] = {
+			source: write_shards(directory, f"sources/{source}", checked_at, months, jsonl)
+			for source, months in by_source.items()
+		}
+		index["months"] = write_shards(directory, "months", checked_at, by_month, jsonl)
+		# e.g. of a source that's no longer collected
+		for name in os.listdir(os.path.join(directory, "sources")):
+			if name not in by_source or not os.path.isdir(os.path.join(directory, "sources", name)):
+				remove_output(os.path.join(directory, "sources", name))
+
+	# Every file's `updated_at` is in the index, so it only changes along with
+	# one of them (or with which files there are)
+	path = os.path.join(directory, "index.json")
+	changed, updated_at = output_changed(path, dump_json(index), checked_at)
+	if changed or not os.path.exists(path):
+		write_file(path, dump_json({ "updated_at": updated_at, **index }))
+	with open(os.path.join(directory, "checked.json"), "w", encoding="utf-8") as f:
+		json.dump({ "checked_at": checked_at, "updated_at": updated_at }, f)
+	return index, changed
+
+
+def write_report(profile, feeds_by_source, stages, events):
+	# Everything measured this run that concerns `profile`, as JSON; times are
+	# in seconds. Stages are shared by every profile
+	def rounded(metrics):
+		return {
+			key: round(value, 4) if isinstance(value, float) else value
+			for key, value in metrics.items()
+		}
+
+	feed_urls = { feed["url"] for feeds in feeds_by_source.values() for feed in feeds }
+	with metrics_lock:
+		feeds = {
+			url: rounded(metrics)
+			for url, metrics in feed_metrics.items()
+			if url in feed_urls or metrics["page_of"] in feed_urls
+		}
+		sources = {}
+		for source in feeds_by_source:
+			counts = source_metrics.get(profile, {}).get(source, new_source_metrics())
+			source_feeds = [ metrics for metrics in feeds.values() if metrics["source"] == source ]
+			sources[source] = {
+				**rounded(counts),
+				"failed": counts["failed"] + sum(metrics["outcome"] == "failed" for metrics in source_feeds),
+				# Feeds are fetched at once, so a source takes as long as its
+				# slowest one
+				"fetch_s": max((metrics["fetch_s"] for metrics in source_feeds), default=0),
+				"duplicates": sum(metrics["duplicates"] for metrics in source_feeds),
 			}
-		})
+	report = {
+		"started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(STARTED_AT)),
+		"duration_s": round(sum(stages.values()), 4),
+		"stages": rounded(stages),
+		"events": len(events),
+		"retry_budget_left_s": round(retry_budget_left, 4),
+		"sources": sources,
+		"feeds": feeds,
+	}
+	with open(os.path.join(OUTPUT_DIR, profile, "rss-report.json"), "w", encoding="utf-8") as f:
+		json.dump(report, f, indent="\t")
+	return report
 
-	print(f"Finished reading XML; got {len(output)} entries. Limiting to latest 10")
-	output.sort(reverse=True, key=lambda obj: datetime.datetime.fromisoformat(obj["datetime"]))
-	return output
 
+# What each command does, as shown by `--help`
+COMMANDS = {
+	"fetch": "collect every feed into the store, then render the output (the default)",
+	"render": "write the output from the stored events alone, without fetching anything",
+	"validate": "check the options and profiles, and list the feeds that 'fetch' would read",
+	"replay": "parse the archived responses into the store again, then render the output, without fetching anything",
+	"daemon": "keep running, fetching each source whenever it's due, and rendering when there's anything new",
+	"bench": "benchmark offline with scripts/bench.py; arguments after it are passed on to it",
+}
 
-def filter_duplicates(evt_list):
-	if not evt_list:
-		return []
 
-	output = []
-	seen = set()
-	for event in evt_list:
-		title = event["title"]
-		evt_type = event["details"]["event"]
-		key = f"{title}-{evt_type}"
-		if key in seen:
-			continue
-		seen.add(key)
-		output.append(event)
-	return output
+def day_timestamp(value):
+	# "2025-07-31" -> its midnight, in UTC
+	return timestamps.to_timestamp(datetime.datetime.fromisoformat(value))
+
 
+def parse_args(argv=None):
+	argv = sys.argv[1:] if argv is None else list(argv)
+	# Without a command it's `fetch`, as it was before there were commands
+	if not argv or argv[0] not in (*COMMANDS, "-h", "--help"):
+		argv = [ "fetch", *argv ]
+	if argv[0] == "bench":
+		# Its options are `bench.py`'s own
+		return argparse.Namespace(command="bench", bench_args=argv[1:])
 
-full_rss = []
-full_rss.extend(filter_duplicates(letterboxd())[:10])
-full_rss.extend(filter_duplicates(wikipedia())[:10])
-full_rss.extend(filter_duplicates(github())[:10])
-full_rss.extend(filter_duplicates(gist())[:10])
-full_rss.extend(filter_duplicates(mal())[:10])
-full_rss.extend(filter_duplicates(goodreads())[:10])
-full_rss.sort(reverse=True, key=lambda obj: datetime.datetime.fromisoformat(obj["datetime"]))
-
-for obj in full_rss:
-	obj["datetime"] = obj["datetime"].replace("+00:00", "Z")
-
-MAX_EVENTS = 50
-print(f"Full event list has size {len(full_rss)}; only the latest {MAX_EVENTS} will be copied")
-
-right_now = datetime.datetime.now(tz=datetime.timezone.utc)
-with open("./public/eu/rss.json", "w", encoding="utf-8") as f:
-	f.write(
-		json.dumps({
-			"updated_at": std_datetime(right_now).replace("+00:00", "Z"),
-			"data": full_rss[:MAX_EVENTS]
-		})
+	options = argparse.ArgumentParser(add_help=False)
+	options.add_argument(
+		"--profiles",
+		default=os.environ.get("RSS_PROFILES"),
+		metavar="PATH",
+		help="JSON file of profiles to collect, as { profile: { account kind: username } } "
+			"(default: the built-in one, 'eu')"
 	)
+	options.add_argument(
+		"--sources",
+		default=os.environ.get("RSS_SOURCES", ",".join(SOURCES)),
+		help=f"comma-separated sources to collect and show (default: {','.join(SOURCES)})"
+	)
+	options.add_argument(
+		"--limit",
+		action="append",
+		default=[],
+		metavar="SOURCE=N",
+		help="most events of SOURCE in the output (default: 10); can be repeated"
+	)
+	options.add_argument(
+		"--max-events",
+		type=int,
+		default=MAX_EVENTS,
+		help=f"most events in the output (default: {MAX_EVENTS})"
+	)
+	options.add_argument(
+		"--jsonl",
+		action="store_true",
+		default=os.environ.get("RSS_JSONL") == "1",
+		help="also write every output file as JSON Lines, one event per line"
+	)
+	options.add_argument(
+		"--no-shards",
+		dest="shards",
+		action="store_false",
+		default=os.environ.get("RSS_SHARDS", "1") == "1",
+		help="only write the latest events, not every stored one by source and by month"
+	)
+	parser = argparse.ArgumentParser(description="Collects recent activity into rss.json")
+	commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+	parsers = {
+		command: commands.add_parser(
+			command,
+			parents=[] if command == "bench" else [ options ],
+			help=description,
+			description=description
+		)
+		for command, description in COMMANDS.items()
+	}
+	parsers["replay"].add_argument(
+		"--since",
+		type=day_timestamp,
+		default=0,
+		metavar="YYYY-MM-DD",
+		help="only replay responses fetched on or after this day (UTC)"
+	)
+	parsers["replay"].add_argument(
+		"--until",
+		type=day_timestamp,
+		default=None,
+		metavar="YYYY-MM-DD",
+		help="only replay responses fetched before this day (UTC)"
+	)
+	parsers["replay"].add_argument(
+		"--rebuild",
+		action="store_true",
+		help="drop the stored events of the replayed feeds first, e.g. after changing how they're parsed"
+	)
+	args = parser.parse_args(argv)
+
+	try:
+		args.profiles = load_profiles(args.profiles) if args.profiles else DEFAULT_PROFILES
+	except (OSError, ValueError) as e:
+		parser.error(f"can't read profiles: {e}")
+	args.sources = [ source.strip() for source in args.sources.split(",") if source.strip() ]
+	unknown = [ source for source in args.sources if source not in SOURCES ]
+	if unknown or not args.sources:
+		parser.error(f"unknown sources {unknown}; choose from {list(SOURCES)}")
+	for limit in args.limit:
+		source, _, amount = limit.partition("=")
+		if source not in SOURCES or not amount.isdigit():
+			parser.error(f"expected --limit SOURCE=N, with SOURCE one of {list(SOURCES)}")
+		SOURCES[source] = SOURCES[source]._replace(limit=int(amount))
+	return args
+
+
+def start_run():
+	# Every poll of `daemon()` is its own run, with its own cutoff, retry
+	# budget and measurements
+	global STARTED_AT, CUTOFF, retry_budget_left
+	STARTED_AT = int(time.time())
+	CUTOFF = STARTED_AT - CUTOFF_DAYS * 24 * 60 * 60
+	retry_budget_left = RETRY_BUDGET
+	with metrics_lock:
+		feed_metrics.clear()
+		source_metrics.clear()
+
+
+def render(plan, args):
+	# Writes each profile's output from the store; returns whether any changed
+	changed = False
+	for profile, feeds_by_source in plan.items():
+		events = latest_events(profile, feeds_by_source, args.max_events)
+		_, profile_changed = write_output(profile, events, feeds_by_source, args.jsonl, args.shards)
+		changed = changed or profile_changed
+	save_cache(OUTPUT_HASHES_PATH, output_hashes)
+	save_artwork()
+	return changed
+
+
+def daemon(plan, args):
+	# Instead of fetching everything on a schedule, each source is fetched
+	# when one of its feeds is due (see `next_check()`), and only the profiles
+	# that got newer events than before are rendered again
+	render(plan, args)
+	while True:
+		start_run()
+		due = {
+			profile: {
+				source: feeds
+				for source, feeds in feeds_by_source.items()
+				if any(next_check(feed["url"], source) <= STARTED_AT for feed in feeds)
+			}
+			for profile, feeds_by_source in plan.items()
+		}
+		due = { profile: feeds_by_source for profile, feeds_by_source in due.items() if feeds_by_source }
+		if due:
+			newest = { url: feed["newest"] for url, feed in feeds.items() }
+			merge(collect(due, adaptive=True), due, STARTED_AT)
+			save_http_cache()
+			fresh = {
+				profile: plan[profile]
+				for profile, feeds_by_source in due.items()
+				if any(
+					feeds.get(feed["url"], {}).get("newest", 0) > newest.get(feed["url"], 0)
+					for source_feeds in feeds_by_source.values()
+					for feed in source_feeds
+				)
+			}
+			changed = render(fresh, args) if fresh else False
+			print(
+				f"Fetched {', '.join(f'{profile}/{source}' for profile in due for source in due[profile])}; "
+				+ (f"new events for {', '.join(fresh)}" if fresh else "nothing new")
+				+ (", output changed" if changed else "")
+			)
+		# Until the next feed is due, but at least a minute
+		wake_at = min(
+			next_check(feed["url"], source)
+			for feeds_by_source in plan.values()
+			for source, source_feeds in feeds_by_source.items()
+			for feed in source_feeds
+		)
+		time.sleep(max(60, wake_at - time.time()))
+
+
+def print_plan(plan):
+	for profile, feeds_by_source in plan.items():
+		for source, feeds in feeds_by_source.items():
+			print(f"{profile}/{source}: limit {SOURCES[source].limit}, fetched at most every {SOURCES[source].ttl}s")
+			for feed in feeds:
+				print(f"\t{feed['url']}")
+		print(f"'{profile}' has {len(feeds_by_source)} sources")
+
+
+def main(argv=None):
+	args = parse_args(argv)
+	if args.command == "bench":
+		import runpy
+		sys.argv = [ os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench.py"), *args.bench_args ]
+		runpy.run_path(sys.argv[0], run_name="__main__")
+		return
+	plan = plan_feeds(args.profiles, args.sources)
+	if args.command == "validate":
+		print_plan(plan)
+		return
+
+	load_state()
+	if args.command == "daemon":
+		# Stopped with Ctrl+C or SIGTERM; anything merged so far is committed
+		signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+		try:
+			daemon(plan, args)
+		except KeyboardInterrupt:
+			pass
+		finally:
+			store.close()
+		return
+	fetching = args.command == "fetch"
+	stages = {}
+
+	def timed(stage, run, *args):
+		started = time.perf_counter()
+		result = run(*args)
+		stages[stage] = time.perf_counter() - started
+		return result
+
+	if fetching:
+		results = timed("collect", collect, plan)
+		timed("store", merge, results, plan, STARTED_AT)
+	elif args.command == "replay":
+		runs = timed("replay", replay, plan, args.since, args.until, args.rebuild)
+		print(f"Replayed {runs} archived runs")
+	outputs = {}
+	changed = False
+	for profile, feeds_by_source in plan.items():
+		events = timed(f"merge {profile}", latest_events, profile, feeds_by_source, args.max_events)
+		_, profile_changed = timed(
+			f"output {profile}", write_output,
+			profile, events, feeds_by_source, args.jsonl, args.shards
+		)
+		changed = changed or profile_changed
+		outputs[profile] = events
+	if fetching:
+		save_http_cache()
+	save_cache(OUTPUT_HASHES_PATH, output_hashes)
+	save_artwork()
+	store.close()
+
+	for profile, feeds_by_source in plan.items():
+		# Only a fetch has anything to report; rendering leaves the last one
+		if fetching:
+			report = write_report(profile, feeds_by_source, stages, outputs[profile])
+			for source, metrics in report["sources"].items():
+				print(
+					f"{profile}/{source}: {metrics['fetch_s']:.2f}s, {metrics['entries']} new entries, "
+					f"{metrics['duplicates']} duplicates, {metrics['shown']} shown"
+					+ (" (failed)" if metrics["failed"] else "")
+				)
+		print(f"'{profile}' event list has size {len(outputs[profile])} (at most {args.max_events})")
+	print(f"Took {sum(stages.values()):.2f}s for {len(plan)} profiles")
+	print("Output changed" if changed else "Output unchanged since the last run")
+	# As the step's `changed` output, so the workflow only deploys when needed
+	# [Ref] https://docs.github.com/en/actions/using-workflows/workflow-commands-for-github-actions#setting-an-output-parameter
+	if "GITHUB_OUTPUT" in os.environ:
+		with open(os.environ["GITHUB_OUTPUT"], "a", encoding="utf-8") as f:
+			f.write(f"changed={'true' if changed else 'false'}\n")
+
+if __name__ == "__main__":
+	main()
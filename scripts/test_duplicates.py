@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+# Events with the same identity (see `Source.identity`) are stored, but only
+# the newest one is shown. Each test merges runs into a fresh store, as
+# `fetch` does, and looks at what `latest_events()` shows and what's stored.
+# Run with `python -m pytest scripts`
+import importlib.util
+import os
+import tempfile
+
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+# Read when the script is imported; each test gets its own store below
+os.environ.setdefault("RSS_CACHE_DIR", tempfile.mkdtemp(prefix="rss-test-"))
+os.environ.setdefault("RSS_ARCHIVE", "0")
+spec = importlib.util.spec_from_file_location("rss", os.path.join(SCRIPTS_DIR, "my-rss.py"))
+rss = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(rss)
+
+# 01:00 UTC yesterday, so a few hours later is still the same day, and well
+# within the cutoff
+DAY_START = (rss.STARTED_AT // 86400 - 1) * 86400 + 3600
+HOUR = 60 * 60
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+	monkeypatch.setattr(rss, "STORE_PATH", str(tmp_path / "events.db"))
+	rss.load_state()
+	yield rss.store
+	rss.store.close()
+
+
+def plan(accounts, source):
+	return rss.plan_feeds({ "eu": accounts }, [ source ])
+
+
+def merge(plan, results):
+	# `results` is feed URL -> this run's entries of it
+	sources = { feed["url"]: source for source, feeds in plan["eu"].items() for feed in feeds }
+	rss.merge({ url: (sources[url], entries) for url, entries in results.items() }, plan, rss.STARTED_AT)
+
+
+def shown(plan):
+	return rss.latest_events("eu", plan["eu"])
+
+
+def stored(store):
+	# URL -> whether it's superseded, of every stored event
+	return dict(store.execute("SELECT url, superseded FROM events"))
+
+
+def wiki_edit(host, title, timestamp, diff):
+	return rss.Event(
+		f"https://{host}/w/index.php?title={rss.wiki_title_url(title)}&diff={diff}",
+		timestamp, title, "wiki",
+		rss.WikiEdit(event="edit-page", kind=host.split(".")[0], description="fix typo")
+	)
+
+
+def github_event(url, event, description, timestamp):
+	return rss.Event(
+		url, timestamp, "MatheusAvellar/api", "github",
+		rss.GithubEvent(kind="github", event=event, description=description)
+	)
+
+
+WIKIS = plan({ "wikimedia": "Avelludo" }, "wikipedia")
+EN, COMMONS, PT = [ feed["url"] for feed in WIKIS["eu"]["wikipedia"] ]
+GITHUB = plan({ "github": "MatheusAvellar" }, "github")
+EVENTS = GITHUB["eu"]["github"][0]["url"]
+REPOSITORY = "https://github.com/MatheusAvellar/api"
+
+
+def test_same_batch(store):
+	older = wiki_edit("en.wikipedia.org", "Largo do Machado", DAY_START, 1)
+	newer = wiki_edit("en.wikipedia.org", "Largo do Machado", DAY_START + HOUR, 2)
+	merge(WIKIS, { EN: [ newer, older ] })
+	assert shown(WIKIS) == [ newer ]
+	assert stored(store) == { newer.url: 0, older.url: 1 }
+
+
+def test_newer_run(store):
+	older = wiki_edit("en.wikipedia.org", "Largo do Machado", DAY_START, 1)
+	newer = wiki_edit("en.wikipedia.org", "Largo do Machado", DAY_START + HOUR, 2)
+	merge(WIKIS, { EN: [ older ] })
+	merge(WIKIS, { EN: [ newer ] })
+	assert shown(WIKIS) == [ newer ]
+	assert stored(store) == { newer.url: 0, older.url: 1 }
+
+
+def test_older_run(store):
+	# e.g. a feed that was failing catches up
+	older = wiki_edit("en.wikipedia.org", "Largo do Machado", DAY_START, 1)
+	newer = wiki_edit("en.wikipedia.org", "Largo do Machado", DAY_START + HOUR, 2)
+	merge(WIKIS, { EN: [ newer ] })
+	merge(WIKIS, { EN: [ older ] })
+	assert shown(WIKIS) == [ newer ]
+	assert stored(store) == { newer.url: 0, older.url: 1 }
+
+
+def test_same_time(store):
+	# The one stored first stays, in the same batch or not
+	first = wiki_edit("en.wikipedia.org", "Largo do Machado", DAY_START, 1)
+	second = wiki_edit("en.wikipedia.org", "Largo do Machado", DAY_START, 2)
+	third = wiki_edit("en.wikipedia.org", "Largo do Machado", DAY_START, 3)
+	merge(WIKIS, { EN: [ first, second ] })
+	merge(WIKIS, { EN: [ third ] })
+	assert shown(WIKIS) == [ first ]
+	assert stored(store) == { first.url: 0, second.url: 1, third.url: 1 }
+
+
+def test_seen_again(store):
+	# The same event again isn't a duplicate of itself
+	edit = wiki_edit("en.wikipedia.org", "Largo do Machado", DAY_START, 1)
+	merge(WIKIS, { EN: [ edit ] })
+	merge(WIKIS, { EN: [ edit ] })
+	assert shown(WIKIS) == [ edit ]
+	assert stored(store) == { edit.url: 0 }
+
+
+def test_other_day(store):
+	today = wiki_edit("en.wikipedia.org", "Largo do Machado", DAY_START + 86400, 2)
+	yesterday = wiki_edit("en.wikipedia.org", "Largo do Machado", DAY_START, 1)
+	merge(WIKIS, { EN: [ today, yesterday ] })
+	assert shown(WIKIS) == [ today, yesterday ]
+
+
+def test_other_wiki(store):
+	en = wiki_edit("en.wikipedia.org", "Largo do Machado", DAY_START, 1)
+	pt = wiki_edit("pt.wikipedia.org", "Largo do Machado", DAY_START + HOUR, 1)
+	commons = wiki_edit("commons.wikimedia.org", "Largo do Machado", DAY_START + 2 * HOUR, 1)
+	merge(WIKIS, { EN: [ en ], PT: [ pt ], COMMONS: [ commons ] })
+	assert shown(WIKIS) == [ commons, pt, en ]
+	assert set(stored(store).values()) == { 0 }
+
+
+def test_other_scope(store):
+	# Events are only duplicates of others from the same account
+	both = rss.plan_feeds({ "eu": { "wikimedia": "Avelludo" }, "ela": { "wikimedia": "Outra" } }, [ "wikipedia" ])
+	mine = wiki_edit("en.wikipedia.org", "Largo do Machado", DAY_START, 1)
+	theirs = wiki_edit("en.wikipedia.org", "Largo do Machado", DAY_START + HOUR, 2)
+	rss.merge({
+		both["eu"]["wikipedia"][0]["url"]: ("wikipedia", [ mine ]),
+		both["ela"]["wikipedia"][0]["url"]: ("wikipedia", [ theirs ]),
+	}, both, rss.STARTED_AT)
+	assert rss.latest_events("eu", both["eu"]) == [ mine ]
+	assert rss.latest_events("ela", both["ela"]) == [ theirs ]
+
+
+def test_github_actions(store):
+	# Different things done in the same repository are all kept, and shown
+	branch = github_event(REPOSITORY, "CreateEvent", "Created branch 'a'", DAY_START)
+	other_branch = github_event(REPOSITORY, "CreateEvent", "Created branch 'b'", DAY_START + HOUR)
+	opened = github_event(f"{REPOSITORY}/pull/1", "PullRequestEvent", "Opened", DAY_START)
+	closed = github_event(f"{REPOSITORY}/pull/1", "PullRequestEvent", "Closed", DAY_START + HOUR)
+	merge(GITHUB, { EVENTS: [ other_branch, closed, branch, opened ] })
+	assert set(shown(GITHUB)) == { branch, other_branch, opened, closed }
+	assert store.execute("SELECT count(*) FROM events WHERE NOT superseded").fetchone()[0] == 4
+
+
+def test_github_same_action(store):
+	# The same thing done again is the same event, stored once, as of the
+	# last time
+	opened = github_event(f"{REPOSITORY}/pull/1", "PullRequestEvent", "Opened", DAY_START)
+	reopened = github_event(f"{REPOSITORY}/pull/1", "PullRequestEvent", "Opened", DAY_START + HOUR)
+	merge(GITHUB, { EVENTS: [ opened ] })
+	merge(GITHUB, { EVENTS: [ reopened ] })
+	assert shown(GITHUB) == [ reopened ]
+	assert store.execute("SELECT count(*) FROM events").fetchone()[0] == 1
+
+
+def test_identity_key():
+	edit = wiki_edit("en.wikipedia.org", "Largo do Machado", DAY_START, 1)
+	key = rss.identity_key("wikimedia:Avelludo", rss.same_page_and_day(edit))
+	assert key == rss.identity_key("wikimedia:Avelludo", rss.same_page_and_day(edit._replace(url="x")))
+	assert key != rss.identity_key("wikimedia:Outra", rss.same_page_and_day(edit))
+	# Fits in SQLite's INTEGER
+	assert -2 ** 63 <= key < 2 ** 63
+
+
+def test_same_url():
+	review = rss.Event(
+		"https://www.goodreads.com/review/show/7918416850?utm_medium=api&utm_source=rss",
+		DAY_START, "Arrival (2002)", "goodreads",
+		rss.GoodreadsAdded("added", "Arrival", "2002", "Ted Chiang", "", "to-read", "0525433678")
+	)
+	assert rss.same_url(review) == rss.same_url(review._replace(url="https://WWW.goodreads.com/review/show/7918416850"))
+	assert rss.same_url(review) != rss.same_url(review._replace(url="https://www.goodreads.com/review/show/1"))
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# The hand-written parsers in `timestamps.py` must give the same answer as
+# `datetime.strptime()`, which they replaced, or fail where it fails.
+# Run with `python -m pytest scripts`
+import datetime
+import random
+
+import pytest
+
+# Next to this file
+import timestamps
+
+RFC822 = "%a, %d %b %Y %H:%M:%S %z"
+ISO8601 = "%Y-%m-%dT%H:%M:%S%z"
+OFFSETS = [
+	datetime.timezone(datetime.timedelta(minutes=minutes))
+	for minutes in (-12 * 60, -7 * 60, -3 * 60, 0, 5 * 60 + 30, 12 * 60, 14 * 60)
+]
+
+
+def sample_dates(count):
+	# Seeded, so a failure can be reproduced; spread over two centuries so leap
+	# years (and 2000, and 1900 and 2100, which aren't) are all covered
+	generator = random.Random(822)
+	start = datetime.datetime(1900, 1, 1, tzinfo=datetime.timezone.utc)
+	span = int((datetime.datetime(2101, 1, 1, tzinfo=datetime.timezone.utc) - start).total_seconds())
+	return [
+		(start + datetime.timedelta(seconds=generator.randrange(span))).astimezone(generator.choice(OFFSETS))
+		for _ in range(count)
+	]
+
+
+def strptime_timestamp(value, layout):
+	return int(datetime.datetime.strptime(value, layout).timestamp())
+
+
+@pytest.mark.parametrize("parse,layout", [
+	(timestamps.parse_rfc822, RFC822),
+	(timestamps.parse_iso8601, ISO8601),
+])
+def test_same_as_strptime(parse, layout):
+	for date in sample_dates(200_000):
+		value = date.strftime(layout)
+		assert parse(value) == strptime_timestamp(value, layout), value
+
+
+@pytest.mark.parametrize("value", [
+	"2025-07-31T17:23:10+00:00",
+	"2025-07-31T17:23:10Z",
+	"2025-07-31t17:23:10-03:00",
+	"2024-02-29T23:59:59+14:00",
+])
+def test_iso8601_zones(value):
+	assert timestamps.parse_iso8601(value) == strptime_timestamp(value, ISO8601)
+
+
+@pytest.mark.parametrize("parse,value", [
+	(timestamps.parse_rfc822, "Sat, 31 Feb 2025 13:03:10 +1200"),
+	(timestamps.parse_rfc822, "Fri, 29 Feb 2025 13:03:10 GMT"),
+	(timestamps.parse_rfc822, "Thu, 29 Feb 1900 13:03:10 GMT"),
+	(timestamps.parse_rfc822, "Wed, 00 Jul 2025 13:03:10 GMT"),
+	(timestamps.parse_rfc822, "Tue, 29 Jul 2025 24:03:10 GMT"),
+	(timestamps.parse_iso8601, "2025-13-01T17:23:10Z"),
+	(timestamps.parse_iso8601, "2025-00-01T17:23:10Z"),
+	(timestamps.parse_iso8601, "2025-04-31T17:23:10Z"),
+	(timestamps.parse_iso8601, "2025-02-29T17:23:10Z"),
+	(timestamps.parse_iso8601, "2025-07-31T17:60:10Z"),
+])
+def test_out_of_range(parse, value):
+	# The fast paths hand these to the standard library, which rejects them
+	with pytest.raises(ValueError):
+		parse(value)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+# Turns the dates feeds use into Unix timestamps (int seconds), without going
+# through `datetime.strptime()`, which is most of the cost of reading an item.
+# The common shapes are taken apart by hand; anything else falls back to the
+# standard library, so unusual dates are slower but still understood
+import datetime
+
+MONTHS = {
+	"Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
+	"Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12,
+}
+# Seconds east of UTC for each zone RFC 822 names. Numeric offsets are added
+# as they're seen, since a feed tends to use the same one for every item
+OFFSETS = {
+	"GMT": 0, "UT": 0, "UTC": 0, "Z": 0,
+	"EST": -5 * 3600, "EDT": -4 * 3600,
+	"CST": -6 * 3600, "CDT": -5 * 3600,
+	"MST": -7 * 3600, "MDT": -6 * 3600,
+	"PST": -8 * 3600, "PDT": -7 * 3600,
+}
+# Days in each month of a common year; February gets one more in leap years
+MONTH_DAYS = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def is_valid_date(year, month, day, hours, minutes, seconds):
+	# What the fast paths take apart by hand can still be out of range, e.g.
+	# "31 Feb"; those go to the standard library instead, which rejects them
+	if not 1 <= month <= 12 or hours > 23 or minutes > 59 or seconds > 59:
+		return False
+	leap = month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+	return 1 <= day <= MONTH_DAYS[month - 1] + leap
+
+
+def days_from_civil(year, month, day):
+	# Days since 1970-01-01 of a proleptic Gregorian date
+	# [Ref] https://howardhinnant.github.io/date_algorithms.html#days_from_civil
+	if month <= 2:
+		year -= 1
+	era = year // 400
+	year_of_era = year - era * 400
+	day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+	day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+	return era * 146097 + day_of_era - 719468
+
+
+def offset_seconds(zone):
+	# "+1200", "-0700", "+05:30" or a name in `OFFSETS`; None if it's none of them
+	offset = OFFSETS.get(zone)
+	if offset is None:
+		digits = zone[1:].replace(":", "")
+		if zone[:1] not in ("+", "-") or len(digits) != 4 or not digits.isdigit():
+			return None
+		offset = int(digits[:2]) * 3600 + int(digits[2:]) * 60
+		if zone[0] == "-":
+			offset = -offset
+		OFFSETS[zone] = offset
+	return offset
+
+
+def to_timestamp(dt):
+	# Dates without a timezone are taken to be in UTC
+	if dt.tzinfo is None:
+		dt = dt.replace(tzinfo=datetime.timezone.utc)
+	return int(dt.timestamp())
+
+
+def parse_rfc822(value):
+	# "Tue, 29 Jul 2025 13:03:10 +1200", as in RSS' <pubDate>
+	parts = value.split()
+	if len(parts) == 6 and parts[0].endswith(","):
+		_, day, month, year, clock, zone = parts
+		month = MONTHS.get(month)
+		offset = offset_seconds(zone)
+		if (
+			month is not None and offset is not None
+			and day.isdigit() and len(year) == 4 and year.isdigit()
+			and len(clock) == 8 and clock[2] == ":" and clock[5] == ":"
+		):
+			hours, minutes, seconds = clock[:2], clock[3:5], clock[6:]
+			if hours.isdigit() and minutes.isdigit() and seconds.isdigit():
+				year, day = int(year), int(day)
+				hours, minutes, seconds = int(hours), int(minutes), int(seconds)
+				if is_valid_date(year, month, day, hours, minutes, seconds):
+					return (
+						days_from_civil(year, month, day) * 86400
+						+ hours * 3600 + minutes * 60 + seconds
+						- offset
+					)
+	# e.g. no weekday, no seconds, two-digit years, other zone names. Imported
+	# here since it's rarely needed, and slow to import
+	import email.utils
+	return to_timestamp(email.utils.parsedate_to_datetime(value))
+
+
+def parse_iso8601(value):
+	# "2025-07-31T17:23:10Z" or "2025-07-31T17:23:10+00:00", as in Atom and
+	# the GitHub API
+	if (
+		len(value) >= 20
+		and value[4] == "-" and value[7] == "-" and value[10] in "Tt "
+		and value[13] == ":" and value[16] == ":"
+	):
+		offset = offset_seconds(value[19:].upper())
+		date, clock = value[:10], value[11:19]
+		if offset is not None and date.replace("-", "").isdigit() and clock.replace(":", "").isdigit():
+			year, month, day = int(date[:4]), int(date[5:7]), int(date[8:])
+			hours, minutes, seconds = int(clock[:2]), int(clock[3:5]), int(clock[6:])
+			if is_valid_date(year, month, day, hours, minutes, seconds):
+				return (
+					days_from_civil(year, month, day) * 86400
+					+ hours * 3600 + minutes * 60 + seconds
+					- offset
+				)
+	# e.g. fractions of a second, no timezone
+	return to_timestamp(datetime.datetime.fromisoformat(value.replace("Z", "+00:00")))